@@ -3,6 +3,9 @@ import { supabase } from '@/lib/db';
 
 export const dynamic = 'force-dynamic';
 
+// Give up on the forecast service after this long and read the table instead
+const SERVICE_TIMEOUT_MS = Number(process.env.FORECAST_SERVICE_TIMEOUT_MS ?? 2000);
+
 export async function GET(request: Request) {
   try {
     const url = new URL(request.url);
@@ -12,6 +15,24 @@ export async function GET(request: Request) {
       courseCode = 'GRAND_TOTAL';
     }
 
+    // Serve from the warm forecast service (src/lib/ml/service.py) when one is configured
+    const serviceUrl = process.env.FORECAST_SERVICE_URL;
+    if (serviceUrl) {
+      try {
+        const response = await fetch(
+          `${serviceUrl}/enrollments?courseCode=${encodeURIComponent(courseCode)}`,
+          { cache: 'no-store', signal: AbortSignal.timeout(SERVICE_TIMEOUT_MS) }
+        );
+        if (response.ok) {
+          return NextResponse.json(await response.json());
+        }
+        console.error('Forecast service error:', response.status);
+      } catch (serviceError) {
+        // Fall back to the table below while the service is down or too slow
+        console.error('Forecast service unreachable:', serviceError);
+      }
+    }
+
     const { data, error } = await supabase
       .from('EnrollmentData')
       .select('year, enrollment, isActual, lowerBound, upperBound')
@@ -0,0 +1,192 @@
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Dashboard columns counted as-is, one breakdown each
+PROFILE_COLUMNS = [
+    'sex', 'isLGBTQIA', 'age', 'civilStatus', 'isPasigueno', 'yearsInPasig',
+    'familyMonthlyIncome', 'religion', 'academicStatus', 'workingStudent',
+    'deansLister', 'presidentsLister', 'feederSchool', 'strandInSHS', 'isPWD',
+]
+
+# Age buckets used by the age-distribution route
+AGE_GROUPS = {
+    'below 18 years old': 'below 18 years old',
+    **{f'{age} years old': '18-24 years old' for age in range(18, 25)},
+}
+
+ALL_COLLEGES = 'All Colleges'
+AGGREGATE_COLUMNS = ['curricularProgram', 'metric', 'category', 'students']
+
+
+def derived_metrics(students):
+    """Breakdowns the routes compute from more than one column"""
+    is_pasig = students['isPasigueno'] == 'Yes'
+    # db.ts counts a missing or empty barangay as 'Unknown'
+    barangay = students['barangay'].astype(object)
+    barangay = barangay.mask(barangay.isna() | (barangay == ''), 'Unknown')
+    return {
+        'ageGroup': students['age'].map(AGE_GROUPS).fillna('25 years old and above'),
+        'residency': pd.Series(np.where(is_pasig, 'pasig', 'nonpasig'), index=students.index),
+        'pasigBarangay': barangay.where(is_pasig),
+        # Same predicate as db.ts, so rows with any other isPasigueno value are not counted
+        'nonPasigBarangay': barangay.where(students['isPasigueno'] == 'No'),
+        'enrollment': students['curricularProgram'],
+    }
+
+
+def compute_aggregates(students):
+    """Count every profile breakdown per curricular program and for All Colleges.
+
+    All metrics are stacked into one long (program, metric, category) frame
+    and counted with a single groupby; the All Colleges rows are summed from
+    those counts rather than from the students again.
+    """
+    columns = {column: students[column] for column in PROFILE_COLUMNS if column in students}
+    columns.update(derived_metrics(students))
+
+    long = pd.DataFrame(columns)
+    long['curricularProgram'] = students['curricularProgram']
+    long = long.melt(id_vars='curricularProgram', var_name='metric', value_name='category').dropna()
+
+    per_program = long.groupby(['curricularProgram', 'metric', 'category'], observed=True).size()
+    per_program = per_program.rename('students').reset_index()
+
+    all_colleges = per_program.groupby(['metric', 'category'], observed=True)['students'].sum().reset_index()
+    all_colleges.insert(0, 'curricularProgram', ALL_COLLEGES)
+
+    aggregates = pd.concat([all_colleges, per_program], ignore_index=True)[AGGREGATE_COLUMNS]
+    aggregates = aggregates.astype({'curricularProgram': str, 'metric': str, 'category': str, 'students': np.int64})
+    return aggregates.sort_values(['curricularProgram', 'metric', 'category'], ignore_index=True)
+
+
+def apply_delta(aggregates, added=None, removed=None):
+    """Refresh aggregates incrementally from added and removed student rows.
+
+    Counts are additive, so only the changed rows are aggregated. Categories
+    whose count drops to zero are kept so that the upsert overwrites them.
+    """
+    parts = [aggregates.set_index(AGGREGATE_COLUMNS[:3])['students']]
+    if added is not None and len(added):
+        parts.append(compute_aggregates(added).set_index(AGGREGATE_COLUMNS[:3])['students'])
+    if removed is not None and len(removed):
+        parts.append(-compute_aggregates(removed).set_index(AGGREGATE_COLUMNS[:3])['students'])
+
+    refreshed = pd.concat(parts).groupby(level=[0, 1, 2]).sum().clip(lower=0)
+    return refreshed.astype(np.int64).reset_index()
+
+
+def snapshot_columns(students):
+    """Columns compute_aggregates reads, plus the email the Dashboard upserts on"""
+    used = ['email', *PROFILE_COLUMNS, 'barangay', 'curricularProgram']
+    return [column for column in used if column in students]
+
+
+def apply_upserts(aggregates, snapshot, changed, current=None):
+    """Refresh aggregates from Dashboard rows upserted on email since the last run.
+
+    snapshot holds the row each counted student was last aggregated from.
+    A student seen again is a re-upload that replaced their row, so that
+    stored row is subtracted before the new one is added; counting only
+    created_at would add them a second time. current, the emails now in
+    the table, lets students deleted since the last run be subtracted as
+    well. Returns the refreshed aggregates and snapshot.
+    """
+    stale = np.zeros(len(snapshot), dtype=bool)
+    if current is not None:
+        stale |= ~snapshot['email'].isin(current).to_numpy()
+    if not changed.empty:
+        changed = changed.drop_duplicates(subset='email', keep='last')
+        stale |= snapshot['email'].isin(changed['email']).to_numpy()
+    if changed.empty and not stale.any():
+        return aggregates, snapshot
+
+    aggregates = apply_delta(aggregates, added=changed, removed=snapshot[stale])
+    kept = [snapshot[~stale]]
+    if not changed.empty:
+        kept.append(changed[snapshot_columns(changed)])
+    return aggregates, pd.concat(kept, ignore_index=True)
+
+
+def fetch_dashboard_rows(supabase, batch_size=1000, since=None, columns='*'):
+    """Read the Dashboard table once, a page at a time, optionally only rows created after since"""
+    rows = []
+    start = 0
+    while True:
+        query = supabase.table('Dashboard').select(columns)
+        if since is not None:
+            query = query.gt('created_at', since)
+        result = query.range(start, start + batch_size - 1).execute()
+        if not result.data:
+            break
+        rows.extend(result.data)
+        start += batch_size
+    return pd.DataFrame(rows)
+
+
+def save_aggregates(aggregates, supabase=None, path=None, batch_size=500):
+    """Write aggregates to the DashboardAggregates table and/or a file.
+
+    The table needs a unique constraint on ("curricularProgram", "metric",
+    "category"). Files ending in .parquet are written as Parquet, others as
+    CSV.
+    """
+    if path:
+        if str(path).endswith('.parquet'):
+            aggregates.to_parquet(path, index=False)
+        else:
+            aggregates.to_csv(path, index=False)
+
+    if supabase is None:
+        return None
+
+    from .forecast import save_records_in_batches
+    records = aggregates.assign(updated_at=datetime.now(timezone.utc).isoformat())
+    return save_records_in_batches(supabase, records, batch_size=batch_size,
+                                   table='DashboardAggregates',
+                                   on_conflict='curricularProgram,metric,category')
+
+
+def load_aggregates(path):
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={'curricularProgram': str, 'metric': str, 'category': str})
+
+
+def main():
+    from .forecast import get_supabase_client
+
+    supabase = get_supabase_client()
+    output = os.getenv("AGGREGATES_OUTPUT")
+    since = os.getenv("AGGREGATES_SINCE")
+
+    # Incremental refresh from the rows upserted since the last run; re-uploads replace
+    # their stored row, so without the snapshot of counted rows recompute everything.
+    # Only the emails of the whole table are read, to subtract deleted students
+    snapshot_path = f"{output}.students.parquet" if output else None
+    if since and output and os.path.exists(output) and os.path.exists(snapshot_path):
+        students = fetch_dashboard_rows(supabase, since=since)
+        emails = fetch_dashboard_rows(supabase, columns='email')
+        current = emails['email'] if 'email' in emails else pd.Series(dtype=object)
+        aggregates, snapshot = apply_upserts(load_aggregates(output), pd.read_parquet(snapshot_path),
+                                             students, current)
+    else:
+        students = fetch_dashboard_rows(supabase)
+        aggregates = compute_aggregates(students) if not students.empty else None
+        snapshot = students[snapshot_columns(students)] if not students.empty else None
+
+    if aggregates is None:
+        print("No Dashboard rows to aggregate")
+        return
+
+    report = save_aggregates(aggregates, supabase=supabase, path=output)
+    if snapshot_path:
+        snapshot.to_parquet(snapshot_path, index=False)
+    print(f"Aggregated {len(students)} students into {len(aggregates)} rows "
+          f"({len(report['failed_batches'])} failed batches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import random
+
+import httpx
+
+from . import profiling
+
+# Statuses worth retrying: timeouts, rate limits and gateway/server errors
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class BatchFailed(Exception):
+    def __init__(self, message, status=None, retryable=True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+def postgrest_credentials():
+    """REST endpoint and key of the Supabase project, from the same variables as get_supabase_client"""
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+
+    if not url or not key:
+        raise ValueError("Missing Supabase credentials in environment variables")
+
+    return f"{url.rstrip('/')}/rest/v1", key
+
+
+def _encode_batches(records, batch_size):
+    """JSON body of every batch, encoded once so retries resend the same bytes"""
+    for start in range(0, len(records), batch_size):
+        batch = records.iloc[start:start + batch_size]
+        # to_json writes NaN as null, matching what the synchronous path sends
+        body = batch.to_json(orient='records', double_precision=15).encode('utf-8')
+        yield start, len(batch), body
+
+
+def _retry_delay(attempt, backoff, max_backoff, response=None):
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), max_backoff)
+    # Exponential backoff with full jitter so concurrent retries spread out
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+async def _send_batch(client, semaphore, url, params, body, retries, backoff, max_backoff, stats):
+    """POST one batch, retrying transient failures; returns the attempts made"""
+    attempt = 0
+    while True:
+        response = None
+        try:
+            async with semaphore:
+                stats['requests'] += 1
+                response = await client.post(url, params=params, content=body)
+            if response.status_code < 300:
+                return attempt + 1
+            raise BatchFailed(f"HTTP {response.status_code}: {response.text[:200]}",
+                              status=response.status_code,
+                              retryable=response.status_code in RETRY_STATUSES)
+        except httpx.TransportError as e:
+            error = BatchFailed(f"{type(e).__name__}: {e}")
+        except BatchFailed as e:
+            error = e
+
+        if not error.retryable or attempt >= retries:
+            error.attempts = attempt + 1
+            raise error
+        stats['retries'] += 1
+        # Sleep outside the semaphore so waiting batches don't hold a connection slot
+        await asyncio.sleep(_retry_delay(attempt, backoff, max_backoff, response))
+        attempt += 1
+
+
+async def save_records_async(records, table='EnrollmentData', on_conflict='courseCode,year',
+                             batch_size=500, concurrency=8, retries=5, backoff=0.5, max_backoff=30.0,
+                             base_url=None, key=None, transport=None, timeout=60.0):
+    """Upsert records through PostgREST with up to concurrency requests in flight.
+
+    All batches share one pooled HTTP client. Each batch is a merge-duplicates
+    upsert on the on_conflict columns, so resending it after a timeout or a
+    5xx leaves the table exactly as one successful request would; transient
+    failures are retried with exponential backoff, and a batch that still
+    fails is reported without stopping the others. transport replaces the
+    network, e.g. with local_client.LocalPostgrestTransport. Returns the
+    same report as save_records_in_batches plus request and retry counts.
+    """
+    if base_url is None:
+        base_url, key = postgrest_credentials()
+
+    headers = {
+        'apikey': key or '',
+        'Authorization': f"Bearer {key or ''}",
+        'Content-Type': 'application/json',
+        # Don't send the rows back: the response would double the bytes on the wire
+        'Prefer': 'resolution=merge-duplicates,return=minimal',
+    }
+    params = {'on_conflict': on_conflict} if on_conflict else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {'requests': 0, 'retries': 0}
+    failed_batches = []
+
+    async def run(client, start, size, body):
+        try:
+            await _send_batch(client, semaphore, f"/{table}", params, body, retries, backoff, max_backoff, stats)
+        except BatchFailed as e:
+            print(f"Failed to save rows {start}-{start + size - 1} after {e.attempts} attempts: {e}")
+            failed_batches.append({"start": start, "size": size, "error": str(e),
+                                   "status": e.status, "attempts": e.attempts})
+
+    with profiling.stage('db_save_async', table=table, rows=len(records), concurrency=concurrency):
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits,
+                                     timeout=timeout, transport=transport) as client:
+            await asyncio.gather(*(run(client, start, size, body)
+                                   for start, size, body in _encode_batches(records, batch_size)))
+
+    failed_batches.sort(key=lambda batch: batch["start"])
+    return {
+        "rows": len(records),
+        "batches": -(-len(records) // batch_size),
+        "failed_batches": failed_batches,
+        "failed_rows": sum(batch["size"] for batch in failed_batches),
+        "requests": stats['requests'],
+        "retries": stats['retries'],
+    }
+
+
+def save_records_concurrently(records, **options):
+    """Blocking wrapper around save_records_async for scripts without an event loop"""
+    return asyncio.run(save_records_async(records, **options))
+
+
+def save_forecast_concurrently(forecasts, actual_data, batch_size=500, concurrency=8, **options):
+    """save_forecast_to_db through the concurrent writer, with the same rows and report"""
+    from .forecast import build_enrollment_records
+
+    records = build_enrollment_records(forecasts, actual_data)
+    return save_records_concurrently(records, batch_size=batch_size, concurrency=concurrency, **options)
+
+
+def print_save_report(report):
+    """Summarize a save report, listing every batch that failed for good"""
+    failed = report["failed_batches"]
+    print(f"Saved {report['rows'] - report['failed_rows']} of {report['rows']} rows in "
+          f"{report['batches']} batches ({report.get('requests', report['batches'])} requests, "
+          f"{report.get('retries', 0)} retries)")
+    if failed:
+        statuses = {}
+        for batch in failed:
+            statuses[batch.get("status")] = statuses.get(batch.get("status"), 0) + 1
+        print(f"{len(failed)} batches failed: " +
+              ', '.join(f"{count} x {status or 'connection error'}" for status, count in statuses.items()))
+        for batch in failed:
+            print(f"  rows {batch['start']}-{batch['start'] + batch['size'] - 1}: {batch['error']}")
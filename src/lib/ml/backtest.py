@@ -0,0 +1,199 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import profiling
+from .model import (
+    calculate_growth_and_bounds,
+    growth_params,
+    iter_course_groups,
+    postprocess_forecast,
+    predict_raw_forecasts,
+)
+
+# Years forecast past each cut-off, and the history a cut-off needs at least
+DEFAULT_HORIZON = 3
+MIN_TRAIN_YEARS = 5
+
+ENGINES = ('prophet', 'prophet_batch', 'vectorized')
+
+
+def parameter_grid(**options):
+    """Every combination of GROWTH_PARAMS overrides, e.g. parameter_grid(dampening=[0.3, 0.5])"""
+    growth_params({name: values[0] for name, values in options.items() if len(values)})
+    return [dict(zip(options, values)) for values in itertools.product(*options.values())]
+
+
+def backtest_cutoffs(df, min_train=MIN_TRAIN_YEARS):
+    """Last history year of every rolling origin with min_train years before it and one after"""
+    years = np.sort(pd.unique(df['Original_Year']))
+    return [int(year) for year in years[min_train - 1:-1]]
+
+
+def _prophet_unit(history, cutoff, end_year, param_sets, batch, cache):
+    # Parameter sets that give a course the same bounds share one fit
+    plans, jobs = [], {}
+    for course, data in iter_course_groups(history):
+        if len(data) < 3:
+            continue
+        last_year = int(data['Original_Year'].max())
+        for index, params in enumerate(param_sets):
+            weighted_growth, cap, floor = calculate_growth_and_bounds(data['Enrollment'], course, params)
+            jobs.setdefault((course, cap, floor), (data, params))
+            plans.append((index, course, weighted_growth, cap, floor, last_year))
+
+    raw = predict_raw_forecasts(jobs, end_year, batch, cache)
+
+    frames = []
+    for index, course, weighted_growth, cap, floor, last_year in plans:
+        if (course, cap, floor) not in raw:
+            continue
+        forecast = postprocess_forecast(raw[(course, cap, floor)].copy(), weighted_growth, cap, floor, last_year)
+        future = forecast[forecast['year'] > cutoff]
+        frames.append(pd.DataFrame({
+            'param_set': index,
+            'course': str(course),
+            'year': future['year'].to_numpy(dtype=np.int64),
+            'yhat': future['yhat'].to_numpy(dtype=np.float64),
+            'yhat_lower': future['yhat_lower'].to_numpy(dtype=np.float64),
+            'yhat_upper': future['yhat_upper'].to_numpy(dtype=np.float64),
+        }))
+    return frames
+
+
+def _vectorized_unit(history, cutoff, end_year, param_sets):
+    from .vectorized import forecast_all_courses_vectorized
+
+    frames = []
+    for index, params in enumerate(param_sets):
+        results = forecast_all_courses_vectorized(history, compact=True, params=params, end_year=end_year)
+        frame = results.to_frame()
+        frame = frame[frame['year'] > cutoff]
+        frames.append(pd.DataFrame({
+            'param_set': index,
+            'course': frame['course'].astype(str).to_numpy(),
+            'year': frame['year'].to_numpy(dtype=np.int64),
+            'yhat': frame['yhat'].to_numpy(dtype=np.float64),
+            'yhat_lower': frame['yhat_lower'].to_numpy(dtype=np.float64),
+            'yhat_upper': frame['yhat_upper'].to_numpy(dtype=np.float64),
+        }))
+    return frames
+
+
+def _backtest_unit(task):
+    """Forecast one chunk of courses from one cut-off under every parameter set"""
+    engine, cutoff, horizon, history, param_sets, cache = task
+    end_year = cutoff + horizon + 1
+    with profiling.stage('backtest_unit', cutoff=cutoff, rows=len(history), param_sets=len(param_sets)):
+        if engine == 'vectorized':
+            frames = _vectorized_unit(history, cutoff, end_year, param_sets)
+        else:
+            frames = _prophet_unit(history, cutoff, end_year, param_sets, engine == 'prophet_batch', cache)
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True).assign(cutoff=cutoff)
+
+
+def _profiled_backtest_unit(task):
+    return _backtest_unit(task), profiling.drain()
+
+
+def _backtest_tasks(df, engine, cutoffs, horizon, param_sets, cache, chunk_size):
+    for cutoff in cutoffs:
+        history = df[df['Original_Year'] <= cutoff]
+        courses = pd.unique(history['Course Code'])
+        for start in range(0, len(courses), chunk_size):
+            chunk = history[history['Course Code'].isin(courses[start:start + chunk_size])]
+            yield engine, cutoff, horizon, chunk, param_sets, cache
+
+
+def run_backtest(df, engine='vectorized', param_sets=None, horizon=DEFAULT_HORIZON, min_train=MIN_TRAIN_YEARS,
+                 cutoffs=None, workers=1, cache=None, chunk_size=None):
+    """Rolling-origin backtest of every course under every parameter set.
+
+    From each cut-off year, the history up to it is forecast horizon years
+    ahead with engine ('prophet', 'prophet_batch' or 'vectorized') and
+    compared with what actually happened. param_sets is a list of
+    GROWTH_PARAMS overrides (see parameter_grid). The (cut-off x course
+    chunk) units run on workers processes. Within a unit every Prophet
+    fit is shared by the parameter sets that give the same bounds, and
+    with a ForecastCache the raw predictions are kept across runs.
+
+    Returns one row per (param_set, course, cutoff, year) with the
+    forecast, its interval, the actual value and the horizon.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    param_sets = [dict(params) for params in (param_sets or [{}])]
+    for params in param_sets:
+        growth_params(params)
+    if cutoffs is None:
+        cutoffs = backtest_cutoffs(df, min_train)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        # A few units per worker keep the pool busy without slicing the vectorized engine too thin
+        chunks_per_cutoff = max(1, math.ceil(workers * 4 / max(1, len(cutoffs)))) if workers > 1 else 1
+        chunk_size = max(1, math.ceil(df['Course Code'].nunique() / chunks_per_cutoff))
+    tasks = list(_backtest_tasks(df, engine, cutoffs, horizon, param_sets, cache, chunk_size))
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        frames = [frame for frame in map(_backtest_unit, tasks) if frame is not None]
+    else:
+        frames = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=profiling.start_worker,
+                                 initargs=profiling.worker_options()) as executor:
+            for frame, records in executor.map(_profiled_backtest_unit, tasks):
+                profiling.extend(records)
+                if frame is not None:
+                    frames.append(frame)
+
+    columns = ['param_set', 'course', 'cutoff', 'year', 'horizon', 'yhat', 'yhat_lower', 'yhat_upper', 'actual']
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    actual = pd.DataFrame({
+        'course': df['Course Code'].astype(str).to_numpy(),
+        'year': df['Original_Year'].to_numpy(dtype=np.int64),
+        'actual': df['Enrollment'].to_numpy(dtype=np.float64),
+    }).drop_duplicates(subset=['course', 'year'], keep='last')
+    predictions = pd.concat(frames, ignore_index=True).merge(actual, on=['course', 'year'])
+    predictions['horizon'] = predictions['year'] - predictions['cutoff']
+    return predictions[columns]
+
+
+def score_backtest(predictions, param_sets=None, by=('param_set',)):
+    """MAPE (%), RMSE and interval coverage of backtest predictions per group.
+
+    by lists the grouping columns, e.g. ('param_set', 'horizon') or
+    ('param_set', 'course'). Zero actuals are left out of MAPE. With
+    param_sets, the overrides of each set are joined as extra columns.
+    """
+    error = predictions['yhat'] - predictions['actual']
+    actual = predictions['actual'].where(predictions['actual'] != 0)
+    scored = predictions.assign(
+        abs_pct_error=(error / actual).abs() * 100,
+        squared_error=error ** 2,
+        covered=(predictions['yhat_lower'] <= predictions['actual'])
+                & (predictions['actual'] <= predictions['yhat_upper']),
+    )
+    groups = scored.groupby(list(by))
+    scores = pd.DataFrame({
+        'mape': groups['abs_pct_error'].mean(),
+        'rmse': np.sqrt(groups['squared_error'].mean()),
+        'coverage': groups['covered'].mean(),
+        'forecasts': groups.size(),
+    })
+
+    if param_sets is not None and 'param_set' in by:
+        overrides = pd.DataFrame([{name: str(value) if isinstance(value, (tuple, list)) else value
+                                   for name, value in params.items()} for params in param_sets])
+        overrides.index.name = 'param_set'
+        scores = scores.join(overrides, on='param_set')
+    return scores
@@ -0,0 +1,246 @@
+import numpy as np
+
+from . import profiling
+from .model import build_prophet_model
+
+# Smoothing widths for |delta|, solved in turn so the Laplace prior ends up nearly exact
+_L1_SMOOTHING = (1e-2, 1e-4, 1e-6, 1e-8)
+# Imaginary step for complex-step gradients (exact to rounding, no cancellation)
+_COMPLEX_STEP = 1e-30
+
+
+def stack_model_inputs(inputs):
+    """Pad the Stan data of several Prophet models into (series, ...) arrays.
+
+    Padded time points are masked out of the likelihood and padded
+    changepoints and regressors are held at zero, where they have no effect
+    on the trend.
+    """
+    n = len(inputs)
+    T = max(inp.T for inp in inputs)
+    S = max(inp.S for inp in inputs)
+    K = max(inp.K for inp in inputs)
+
+    data = {
+        't': np.zeros((n, T)), 'y': np.zeros((n, T)), 'cap': np.ones((n, T)),
+        'mask': np.zeros((n, T), dtype=bool), 'A': np.zeros((n, T, S)),
+        't_change': np.zeros((n, S)), 'cp_mask': np.zeros((n, S), dtype=bool),
+        'X_sa': np.zeros((n, T, K)), 'X_sm': np.zeros((n, T, K)), 'sigmas': np.ones((n, K)),
+        'beta_mask': np.zeros((n, K), dtype=bool), 'tau': np.zeros(n), 'T': np.zeros(n),
+    }
+    for i, inp in enumerate(inputs):
+        t = np.asarray(inp.t, dtype=float)
+        t_change = np.asarray(inp.t_change, dtype=float)
+        X = np.asarray(inp.X, dtype=float)
+        data['t'][i, :inp.T] = t
+        data['y'][i, :inp.T] = np.asarray(inp.y, dtype=float)
+        data['cap'][i, :inp.T] = np.asarray(inp.cap, dtype=float)
+        data['mask'][i, :inp.T] = True
+        # Same as get_changepoint_matrix in prophet.stan
+        data['A'][i, :inp.T, :inp.S] = t[:, None] >= t_change[None, :]
+        data['t_change'][i, :inp.S] = t_change
+        data['cp_mask'][i, :inp.S] = True
+        data['X_sa'][i, :inp.T, :inp.K] = X * np.asarray(inp.s_a, dtype=float)
+        data['X_sm'][i, :inp.T, :inp.K] = X * np.asarray(inp.s_m, dtype=float)
+        data['sigmas'][i, :inp.K] = np.asarray(inp.sigmas, dtype=float)
+        data['beta_mask'][i, :inp.K] = True
+        data['tau'][i] = inp.tau
+        data['T'][i] = inp.T
+    return data
+
+
+def _subset(data, index):
+    return {name: values[index] for name, values in data.items()}
+
+
+def neg_log_posterior(theta, data, smoothing):
+    """Prophet's logistic-growth objective for every series at once.
+
+    theta holds [k, m, log sigma_obs, delta..., beta...] per row and may be
+    complex for complex-step differentiation. |delta| is smoothed to
+    sqrt(delta^2 + smoothing^2). As with Stan's optimizer, no Jacobian is
+    added for sigma_obs, so the optimum is the same MAP estimate.
+    """
+    S = data['t_change'].shape[1]
+    k, m, log_sigma = theta[:, 0], theta[:, 1], theta[:, 2]
+    delta = theta[:, 3:3 + S]
+    beta = theta[:, 3 + S:]
+
+    # logistic_gamma: offsets that keep the piecewise trend continuous
+    k_s = np.concatenate([k[:, None], k[:, None] + np.cumsum(delta, axis=1)], axis=1)
+    gamma = np.zeros_like(delta)
+    m_pr = m
+    for s in range(S):
+        ratio = np.divide(k_s[:, s], k_s[:, s + 1], out=np.ones_like(k_s[:, s]), where=data['cp_mask'][:, s])
+        gamma[:, s] = (data['t_change'][:, s] - m_pr) * (1 - ratio)
+        m_pr = m_pr + gamma[:, s]
+
+    rate = k[:, None] + np.einsum('nts,ns->nt', data['A'], delta)
+    offset = m[:, None] + np.einsum('nts,ns->nt', data['A'], gamma)
+    # Line-search trial points can overflow; the resulting inf objective is simply rejected
+    with np.errstate(over='ignore'):
+        trend = data['cap'] / (1 + np.exp(-rate * (data['t'] - offset)))
+    yhat = (trend * (1 + np.einsum('ntk,nk->nt', data['X_sm'], beta))
+            + np.einsum('ntk,nk->nt', data['X_sa'], beta))
+
+    sigma = np.exp(log_sigma)
+    residuals = np.where(data['mask'], data['y'] - yhat, 0)
+    abs_delta = np.sqrt(delta ** 2 + smoothing ** 2)
+    return (k ** 2 / 50 + m ** 2 / 50
+            + np.sum(np.where(data['cp_mask'], abs_delta, 0), axis=1) / data['tau']
+            + sigma ** 2 / 0.5
+            + np.sum(np.where(data['beta_mask'], beta ** 2 / (2 * data['sigmas'] ** 2), 0), axis=1)
+            + data['T'] * log_sigma
+            + np.sum(residuals ** 2, axis=1) / (2 * sigma ** 2))
+
+
+def _gradient(theta, data, smoothing, free):
+    grad = np.zeros(theta.shape)
+    for j in np.flatnonzero(free.any(axis=0)):
+        shifted = theta.astype(complex)
+        shifted[:, j] += 1j * _COMPLEX_STEP
+        grad[:, j] = neg_log_posterior(shifted, data, smoothing).imag / _COMPLEX_STEP
+    return np.where(free, grad, 0)
+
+
+def _minimize(theta, data, smoothing, free, max_iter=2000):
+    """BFGS with a backtracking line search, run for every series at once.
+
+    Each series keeps its own inverse Hessian and stops on its own, using
+    the default convergence tolerances of Stan's optimizer; later
+    iterations only evaluate the series still moving.
+    """
+    n, P = theta.shape
+    theta = theta.copy()
+    value = neg_log_posterior(theta, data, smoothing)
+    grad = _gradient(theta, data, smoothing, free)
+    inv_hess = np.tile(np.eye(P), (n, 1, 1))
+    first = np.ones(n, dtype=bool)
+    active = np.arange(n)
+
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        sub = _subset(data, active)
+        th, g, f, H = theta[active], grad[active], value[active], inv_hess[active]
+
+        direction = -np.einsum('nij,nj->ni', H, g)
+        slope = np.sum(direction * g, axis=1)
+        # Fall back to steepest descent where the curvature estimate went wrong
+        reset = ~(slope < 0)
+        direction[reset] = -g[reset]
+        H[reset] = np.eye(P)
+        slope[reset] = -np.sum(g[reset] ** 2, axis=1)
+
+        step = np.ones(len(active))
+        candidate = th + direction
+        new_value = neg_log_posterior(candidate, sub, smoothing)
+        for _ in range(50):
+            failed = ~(np.isfinite(new_value) & (new_value <= f + 1e-4 * step * slope))
+            if not failed.any():
+                break
+            step[failed] /= 2
+            retry = np.flatnonzero(failed)
+            candidate[retry] = th[retry] + step[retry, None] * direction[retry]
+            new_value[retry] = neg_log_posterior(candidate[retry], _subset(sub, retry), smoothing)
+        moved = ~failed
+
+        new_grad = _gradient(candidate, sub, smoothing, free[active])
+        s = candidate - th
+        y = new_grad - g
+        sy = np.sum(s * y, axis=1)
+        update = moved & (sy > 1e-16)
+        if update.any():
+            # Scale the first inverse Hessian to the observed curvature
+            scale = np.where(first[active], sy / np.maximum(np.sum(y * y, axis=1), 1e-300), 1.0)
+            Hs = H * np.where(update, scale, 1.0)[:, None, None]
+            rho = np.where(update, 1 / np.where(update, sy, 1), 0)
+            left = np.eye(P) - rho[:, None, None] * s[:, :, None] * y[:, None, :]
+            updated = left @ Hs @ left.transpose(0, 2, 1) + rho[:, None, None] * s[:, :, None] * s[:, None, :]
+            H[update] = updated[update]
+            first[active[update]] = False
+
+        theta[active[moved]] = candidate[moved]
+        value[active[moved]] = new_value[moved]
+        grad[active[moved]] = new_grad[moved]
+        inv_hess[active] = H
+
+        change = np.abs(f - new_value)
+        done = (~moved
+                | (change < 1e-12)
+                | (change / np.maximum(np.maximum(np.abs(f), np.abs(new_value)), 1) < 1e4 * np.finfo(float).eps)
+                | (np.linalg.norm(new_grad, axis=1) < 1e-8)
+                | (np.linalg.norm(s, axis=1) < 1e-8))
+        active = active[~done]
+
+    return theta
+
+
+def optimize_stacked(inputs, initial):
+    """MAP estimates for every model input in one batched optimization.
+
+    initial holds each model's Prophet initial parameters. Returns one
+    params dict per input, shaped like Prophet.params after a Stan fit.
+    """
+    data = stack_model_inputs(inputs)
+    n, S, K = len(inputs), data['t_change'].shape[1], data['sigmas'].shape[1]
+
+    theta = np.zeros((n, 3 + S + K))
+    free = np.zeros(theta.shape, dtype=bool)
+    free[:, :3] = True
+    free[:, 3:3 + S] = data['cp_mask']
+    free[:, 3 + S:] = data['beta_mask']
+    for i, params in enumerate(initial):
+        theta[i, 0], theta[i, 1] = params.k, params.m
+        theta[i, 2] = np.log(params.sigma_obs)
+        theta[i, 3:3 + inputs[i].S] = params.delta
+        theta[i, 3 + S:3 + S + inputs[i].K] = params.beta
+
+    for smoothing in _L1_SMOOTHING:
+        theta = _minimize(theta, data, smoothing, free)
+
+    return [{
+        'k': np.array([[theta[i, 0]]]),
+        'm': np.array([[theta[i, 1]]]),
+        'sigma_obs': np.array([[np.exp(theta[i, 2])]]),
+        'delta': theta[i, 3:3 + inp.S][None, :],
+        'beta': theta[i, 3 + S:3 + S + inp.K][None, :],
+    } for i, inp in enumerate(inputs)]
+
+
+def fit_prophet_batch(groups, params=None):
+    """Fit the Prophet model of every (course, data) pair in one batched optimization.
+
+    Each course gets the same Prophet model, cap/floor and changepoints as
+    fit_prophet_model, but the MAP fit runs in NumPy over all courses
+    together instead of one cmdstan process per course, so there is no
+    per-course process start or Stan file I/O. It is not a drop-in for
+    Stan: the posterior is multimodal in k and the changepoint deltas, and
+    this BFGS can settle on a different mode than Stan's L-BFGS from the
+    same start (on EnrollmentData.csv GRAND_TOTAL's k differs several-fold
+    and yhat by up to ~6%), so 'prophet_batch' forecasts differ from
+    'prophet' ones. params is one GROWTH_PARAMS override
+    per group, or None. Returns (course, model, weighted_growth, cap,
+    floor, error) tuples in input order.
+    """
+    if params is None:
+        params = [None] * len(groups)
+    prepared, results = [], [None] * len(groups)
+    for i, ((course, data), overrides) in enumerate(zip(groups, params)):
+        try:
+            model, prophet_df, weighted_growth, cap, floor = build_prophet_model(data, course, overrides)
+            inputs = model.preprocess(prophet_df)
+            initial = model.calculate_initial_params(inputs.K)
+            prepared.append((i, course, model, inputs, initial, weighted_growth, cap, floor))
+        except Exception as e:
+            results[i] = (course, None, None, None, None, e)
+
+    if prepared:
+        with profiling.stage('fit_batch', rows=sum(p[3].T for p in prepared), series=len(prepared)):
+            fitted = optimize_stacked([p[3] for p in prepared], [p[4] for p in prepared])
+        for (i, course, model, inputs, initial, weighted_growth, cap, floor), model_params in zip(prepared, fitted):
+            model.params = model_params
+            model.stan_fit = None
+            results[i] = (course, model, weighted_growth, cap, floor, None)
+
+    return results
@@ -0,0 +1,208 @@
+"""Benchmark the forecasting pipeline on synthetic catalogues of growing size.
+
+Run from the repository root, for example:
+
+    python -m src.lib.ml.benchmark --courses 12 100 1000 --years 10 50 --output bench.json
+
+Each (courses, years) case generates an EnrollmentData-style CSV, then times
+load_and_prepare_data, forecast_all_courses, create_forecast_summary and
+save_forecast_to_db (against LocalSupabaseClient, so no network is needed).
+save_forecast_concurrently runs against LocalPostgrestTransport; --db-latency
+adds a simulated round trip to both writers.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .async_writer import save_forecast_concurrently
+from .forecast import save_forecast_to_db
+from .local_client import LocalPostgrestTransport, LocalSupabaseClient
+from .model import create_forecast_summary, forecast_all_courses, load_and_prepare_data
+from .profiling import max_rss_mb
+
+# Same programs as data/dummy_data_generator.py; larger catalogues get numbered codes
+COURSES = ['BSCS', 'BSIT', 'BSA', 'BSBA', 'BEED', 'BSED-FIL', 'BSED-ENG', 'BSED-MATH', 'BSN', 'BSECE', 'BSHM', 'ABPSYCH']
+
+
+def generate_enrollment_csv(path, num_courses, num_years, start_year=None, seed=0):
+    """Write a synthetic EnrollmentData.csv with num_courses courses plus GRAND_TOTAL"""
+    rng = np.random.default_rng(seed)
+    if start_year is None:
+        start_year = 2023 - num_years
+
+    courses = COURSES[:num_courses] + [f"C{i:05d}" for i in range(len(COURSES), num_courses)]
+    years = np.arange(start_year, start_year + num_years)
+
+    # Random walk in log space around a per-course starting size
+    start = rng.integers(50, 1000, size=(num_courses, 1))
+    steps = rng.normal(0.02, 0.08, size=(num_courses, num_years))
+    steps[:, 0] = 0
+    enrollment = np.maximum(1, np.round(start * np.exp(steps.cumsum(axis=1)))).astype(np.int64)
+
+    df = pd.DataFrame({
+        'Year': np.repeat(years[None, :], num_courses, axis=0).T.ravel(),
+        # Pad the codes like the real export does
+        'Course Code': np.tile([f"{course:<20}" for course in courses], num_years),
+        'Enrollment': enrollment.T.ravel(),
+    })
+    totals = pd.DataFrame({'Year': years, 'Course Code': 'GRAND_TOTAL', 'Enrollment': enrollment.sum(axis=0)})
+    df = pd.concat([df, totals]).sort_values('Year', kind='stable')
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def measure(stage, func, *args, trace_memory=False, **kwargs):
+    """Run func once and return its result with wall time, CPU time and memory use.
+
+    max_rss_mb is the process high-water mark after the stage (None on
+    Windows). trace_memory adds the stage's own peak Python allocation from
+    tracemalloc, which is exact but slows allocation-heavy stages down
+    considerably.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    stats = {
+        'stage': stage,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'max_rss_mb': max_rss_mb(),
+    }
+    if trace_memory:
+        stats['peak_traced_mb'] = peak / (1024 * 1024)
+    return result, stats
+
+
+class _SlowLocalClient(LocalSupabaseClient):
+    """LocalSupabaseClient with a fixed delay per request, like a remote database"""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def table(self, name):
+        time.sleep(self.latency)
+        return super().table(name)
+
+
+def run_case(num_courses, num_years, engine='vectorized', workers=1, batch_size=500, trace_memory=False,
+             db_latency=0.0, concurrency=8):
+    """Benchmark every pipeline stage for one synthetic catalogue"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'EnrollmentData.csv')
+        rows = generate_enrollment_csv(path, num_courses, num_years)
+
+        df, load = measure('load_and_prepare_data', load_and_prepare_data, path,
+                           trace_memory=trace_memory)
+        forecasts, fit = measure('forecast_all_courses', forecast_all_courses, df,
+                                 workers=workers, engine=engine, trace_memory=trace_memory)
+        _, summary = measure('create_forecast_summary', create_forecast_summary, forecasts,
+                             trace_memory=trace_memory)
+
+        client = _SlowLocalClient(db_latency)
+        _, save = measure('save_forecast_to_db', save_forecast_to_db, forecasts, df,
+                          batch_size=batch_size, supabase=client, trace_memory=trace_memory)
+        save['requests'] = client.requests
+
+        transport = LocalPostgrestTransport(latency=db_latency)
+        report, save_async = measure('save_forecast_concurrently', save_forecast_concurrently, forecasts, df,
+                                     batch_size=batch_size, concurrency=concurrency,
+                                     base_url='http://localhost/rest/v1', key='local', transport=transport,
+                                     trace_memory=trace_memory)
+        save_async['requests'] = report['requests']
+
+    results = []
+    for stage in (load, fit, summary, save, save_async):
+        stage.update({'courses': num_courses, 'years': num_years, 'rows': rows, 'engine': engine, 'workers': workers})
+        results.append(stage)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(previous, current):
+    """Print the wall-time ratio of each stage against an earlier results file"""
+    key = lambda stage: (stage['courses'], stage['years'], stage['engine'], stage['stage'])
+    before = {key(stage): stage for stage in previous['results']}
+
+    print(f"Compared with {previous.get('commit') or 'previous run'}:")
+    for stage in current['results']:
+        old = before.get(key(stage))
+        if old is None or not old['wall_s']:
+            continue
+        ratio = stage['wall_s'] / old['wall_s']
+        print(f"{stage['courses']:>6} courses {stage['years']:>3} years  {stage['stage']:<26} "
+              f"{old['wall_s']:8.3f}s -> {stage['wall_s']:8.3f}s  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, nargs='+', default=[12, 100, 1000, 10000])
+    parser.add_argument('--years', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--engine', choices=['prophet', 'prophet_batch', 'vectorized'], default='vectorized',
+                        help="Prophet takes seconds per course, so keep --courses small with it")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--db-latency', type=float, default=0.0,
+                        help="Seconds of simulated round trip per database request")
+    parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight for the async writer")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record per-stage peak allocations with tracemalloc (slow)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="Earlier results file to compare wall times against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for num_courses in args.courses:
+        for num_years in args.years:
+            for stage in run_case(num_courses, num_years, args.engine, args.workers,
+                                  args.batch_size, args.trace_memory, args.db_latency, args.concurrency):
+                rss = f"{stage['max_rss_mb']:8.1f}MB" if stage['max_rss_mb'] is not None else f"{'-':>10}"
+                print(f"{stage['courses']:>6} courses {stage['years']:>3} years  {stage['stage']:<26} "
+                      f"{stage['wall_s']:8.3f}s wall {stage['cpu_s']:8.3f}s cpu {rss} rss")
+                results.append(stage)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} measurements to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
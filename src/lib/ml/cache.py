@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import pickle
+from importlib.metadata import version
+
+import numpy as np
+import pandas as pd
+
+from .model import FORECAST_END_YEAR, GROWTH_PARAMS, PROPHET_PARAMS, calculate_growth_and_bounds, growth_params
+
+# Bump when create_prophet_forecast post-processing changes so old entries miss
+CACHE_VERSION = 1
+
+
+def _history_digest(data, params):
+    ds = pd.to_datetime(data['Year']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    y = data['Enrollment'].to_numpy(dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(ds.tobytes())
+    digest.update(y.tobytes())
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def forecast_cache_key(data, course_code, engine='prophet', params=None):
+    """Hash a course's (ds, y) history together with everything the fit depends on"""
+    _, cap, floor = calculate_growth_and_bounds(data['Enrollment'], course_code, params)
+
+    key_params = {
+        'cap': float(cap),
+        'floor': float(floor),
+        'prophet': PROPHET_PARAMS,
+        'end_year': FORECAST_END_YEAR,
+        # Read from the package metadata so a cache hit never imports prophet
+        'prophet_version': version('prophet'),
+        'cache_version': CACHE_VERSION,
+    }
+    # Batched fits settle on their own optimum, so they never share entries with Stan's
+    if engine != 'prophet':
+        key_params['engine'] = engine
+    # Only non-default growth settings enter the key, so existing entries stay valid
+    if params and growth_params(params) != GROWTH_PARAMS:
+        key_params['growth'] = growth_params(params)
+    return _history_digest(data, key_params)
+
+
+def fit_cache_key(data, cap, floor, end_year=FORECAST_END_YEAR, engine='prophet'):
+    """Hash of a raw prediction (see model.predict_prophet_raw): history, bounds and fit settings only"""
+    return _history_digest(data, {
+        'stage': 'raw_prediction',
+        'cap': float(cap),
+        'floor': float(floor),
+        'prophet': PROPHET_PARAMS,
+        'end_year': end_year,
+        'prophet_version': version('prophet'),
+        'cache_version': CACHE_VERSION,
+        'engine': engine,
+    })
+
+
+class ForecastCache:
+    """On-disk cache of create_prophet_forecast results keyed on forecast_cache_key.
+
+    Entries are pickled forecast DataFrames. When the directory grows past
+    max_bytes the least recently used entries are removed. The directory
+    size is tracked in memory and only rescanned once it crosses max_bytes,
+    so a put does not list every entry. Unreadable entries count as misses
+    and are deleted.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = sum(size for _, size, _ in self._entries())
+
+    def key(self, data, course_code, engine='prophet', params=None):
+        return forecast_cache_key(data, course_code, engine, params)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            forecast = pd.read_pickle(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+            # A truncated or incompatible entry is recomputed and rewritten
+            self.misses += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        # Touch the entry so eviction treats it as recently used
+        os.utime(path)
+        self.hits += 1
+        return forecast
+
+    def put(self, key, forecast):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        forecast.to_pickle(tmp_path)
+        self._bytes += os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,336 @@
+"""Command-line entry point for the enrollment forecasting pipeline.
+
+Run from the repository root, for example:
+
+    python -m src.lib.ml.cli forecast data.csv --output forecasts.parquet
+    python -m src.lib.ml.cli summary forecasts.parquet
+    python -m src.lib.ml.cli save forecasts.parquet --input data.csv
+    python -m src.lib.ml.cli plot forecasts.parquet --input data.csv --output-dir charts
+    python -m src.lib.ml.cli backtest data.csv --grid dampening=0.3,0.5,0.7 --workers 4
+    python -m src.lib.ml.cli scenario data.csv --set dampening=0.8 --adjust BSN=1.1
+    python -m src.lib.ml.cli segments students.parquet --segment course_sex=curricularProgram+sex
+    python -m src.lib.ml.cli forecast data.csv --store forecasts.db
+    python -m src.lib.ml.cli history forecasts.db --course BSIT --runs 5
+    python -m src.lib.ml.cli imports
+
+Each subcommand imports only what it needs: prophet is loaded only when
+fitting, matplotlib only when plotting and supabase only when saving, so
+the other commands start in a fraction of a second.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Dependencies worth loading lazily, in the order the imports report lists them
+HEAVY_MODULES = ['pandas', 'pyarrow.parquet', 'prophet', 'matplotlib.pyplot', 'supabase', 'httpx', 'dotenv']
+PACKAGE_MODULES = ['model', 'forecast', 'async_writer', 'columnar', 'vectorized', 'backtest', 'scenario', 'segments',
+                   'forecast_store', 'service', 'render']
+
+
+def _load(args):
+    from .model import load_and_prepare_data
+    return load_and_prepare_data(args.input, chunksize=args.chunksize)
+
+
+def _read_forecasts(path):
+    from .columnar import forecast_table_to_dict, read_forecasts
+    return forecast_table_to_dict(read_forecasts(path))
+
+
+def cmd_load(args):
+    if args.validation_report:
+        from .model import load_and_prepare_data
+        from .validation import print_validation_summary, validate_enrollment
+        df, report = validate_enrollment(load_and_prepare_data(args.input, chunksize=args.chunksize,
+                                                               validate=False))
+        print_validation_summary(report)
+        report.to_csv(args.validation_report, index=False)
+        print(f"Wrote {len(report)} findings to {args.validation_report}")
+    else:
+        df = _load(args)
+    years = df['Original_Year']
+    print(f"Loaded {len(df)} rows for {df['Course Code'].nunique()} courses, {years.min()}-{years.max()}")
+    if args.output:
+        df.to_parquet(args.output, index=False)
+        print(f"Wrote prepared data to {args.output}")
+
+
+def cmd_forecast(args):
+    from .cache import ForecastCache
+    from .columnar import write_forecasts_parquet
+    from .model import forecast_all_courses
+
+    df = _load(args)
+    cache = ForecastCache(args.cache_dir) if args.cache_dir else None
+    forecasts = forecast_all_courses(df, workers=args.workers, cache=cache, engine=args.engine,
+                                     reconcile=args.reconcile)
+    write_forecasts_parquet(forecasts, df, args.output)
+    print(f"Wrote forecasts for {len(forecasts)} courses to {args.output}")
+    if args.store:
+        from .forecast_store import ForecastStore
+        with ForecastStore(args.store) as store:
+            run = store.record_run(forecasts, label=args.label, engine=args.engine,
+                                   history_end=df['Original_Year'].max())
+        print(f"Recorded forecast run {run} in {args.store}")
+
+
+def cmd_save(args):
+    forecasts = _read_forecasts(args.forecasts)
+    if args.concurrency > 1:
+        from .async_writer import print_save_report, save_forecast_concurrently
+        print_save_report(save_forecast_concurrently(forecasts, _load(args), batch_size=args.batch_size,
+                                                     concurrency=args.concurrency, retries=args.retries))
+        return
+
+    from .forecast import save_forecast_to_db
+    report = save_forecast_to_db(forecasts, _load(args), batch_size=args.batch_size)
+    print(f"Saved {report['rows']} rows in {report['batches']} requests, "
+          f"{report['failed_rows']} rows failed")
+
+
+def cmd_plot(args):
+    from .model import plot_forecasts
+
+    forecasts = _read_forecasts(args.forecasts)
+    plot_forecasts(forecasts, _load(args), output_dir=args.output_dir,
+                   formats=tuple(args.formats), workers=args.workers)
+
+
+def cmd_summary(args):
+    from .model import create_forecast_summary, print_forecast_summary
+    print_forecast_summary(create_forecast_summary(_read_forecasts(args.forecasts)))
+
+
+def _grid_values(text):
+    """'0.3,0.5' -> [0.3, 0.5]; pairs such as cap multipliers are written '1.25:1.3'"""
+    return [tuple(float(part) for part in value.split(':')) if ':' in value else float(value)
+            for value in text.split(',')]
+
+
+def cmd_backtest(args):
+    from .backtest import parameter_grid, run_backtest, score_backtest
+    from .cache import ForecastCache
+
+    options = {}
+    for entry in args.grid:
+        name, _, values = entry.partition('=')
+        options[name] = _grid_values(values)
+    param_sets = parameter_grid(**options)
+
+    df = _load(args)
+    cache = ForecastCache(args.cache_dir) if args.cache_dir else None
+    predictions = run_backtest(df, engine=args.engine, param_sets=param_sets, horizon=args.horizon,
+                               min_train=args.min_train, workers=args.workers, cache=cache)
+    if args.output:
+        predictions.to_csv(args.output, index=False)
+    scores = score_backtest(predictions, param_sets).sort_values('mape')
+    print(scores.head(args.top).to_string())
+
+
+def cmd_scenario(args):
+    from .cache import ForecastCache
+    from .scenario import ScenarioPlanner
+
+    params = {}
+    for entry in args.set:
+        name, _, value = entry.partition('=')
+        params[name] = _grid_values(value)[0]
+    adjustments = {}
+    for entry in args.adjust:
+        course, _, factor = entry.rpartition('=')
+        adjustments[course] = float(factor)
+
+    cache = ForecastCache(args.cache_dir) if args.cache_dir else None
+    planner = ScenarioPlanner(_load(args), engine=args.engine, cache=cache)
+    result = planner.run(params=params, adjustments=adjustments, horizon=args.horizon)
+    print(result['deltas'].to_string(index=False))
+    print("\nChange in the sum of courses per year:")
+    print(result['total_delta'].to_string())
+
+
+def cmd_segments(args):
+    from .segments import SEGMENTS, forecast_segments, load_students
+
+    segments = dict(SEGMENTS)
+    if args.segment:
+        segments = {}
+        for entry in args.segment:
+            name, _, columns = entry.partition('=')
+            segments[name] = tuple(columns.split('+'))
+    forecasts = forecast_segments(load_students(args.input), segments, horizon=args.horizon)
+    frame = forecasts.to_frame()
+    print(f"Forecast {len(forecasts)} segment series")
+    if args.output:
+        frame.to_parquet(args.output, index=False)
+        print(f"Wrote {len(frame)} rows to {args.output}")
+
+
+def cmd_history(args):
+    from .forecast_store import ForecastStore
+
+    with ForecastStore(args.store) as store:
+        if args.course:
+            rows = store.course(args.course, last_runs=args.runs, years=(args.year, args.year) if args.year else None)
+        elif args.year:
+            rows = store.year(args.year, run=args.run)
+        elif args.compare:
+            try:
+                rows = store.compare(args.run or store.latest_run())
+            except LookupError:
+                print("no earlier run to compare")
+                return
+        else:
+            rows = store.runs(limit=args.runs)
+    print(rows.to_string(index=False))
+
+
+def _import_time(module):
+    """Cumulative import time of module in a fresh interpreter, from -X importtime"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        return None
+    # Lines read "import time: self [us] | cumulative | name", nested imports indented
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2] == f" {module}":
+            return int(fields[1]) / 1e6
+    return None
+
+
+def cmd_imports(args):
+    modules = HEAVY_MODULES + [f"{__package__}.{name}" for name in PACKAGE_MODULES]
+    print(f"{'module':<28} {'import s':>9}")
+    for module in modules:
+        seconds = _import_time(module)
+        print(f"{module:<28} {seconds:9.3f}" if seconds is not None else f"{module:<28} {'missing':>9}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--import-report', action='store_true',
+                        help="After the command, list the heavy modules it loaded")
+    parser.add_argument('--profile', metavar='JSONL',
+                        help="Append per-stage timings to this file and print a table at the end")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="With --profile, record each stage's peak allocation with tracemalloc (slow)")
+    parser.add_argument('--cprofile', metavar='PATH', help="With --profile, dump a cProfile of the run here")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def with_input(command):
+        command.add_argument('--input', required=True, help="Enrollment CSV, Parquet or Arrow file")
+        command.add_argument('--chunksize', type=int)
+
+    load = commands.add_parser('load', help="Load and validate the enrollment data")
+    load.add_argument('input')
+    load.add_argument('--chunksize', type=int)
+    load.add_argument('--output', help="Write the prepared data to this Parquet file")
+    load.add_argument('--validation-report', help="Write every data-quality finding to this CSV")
+    load.set_defaults(func=cmd_load)
+
+    forecast = commands.add_parser('forecast', help="Forecast every course to a Parquet file")
+    forecast.add_argument('input')
+    forecast.add_argument('--chunksize', type=int)
+    forecast.add_argument('--output', default='forecasts.parquet')
+    forecast.add_argument('--engine', choices=['prophet', 'prophet_batch', 'vectorized'], default='prophet')
+    forecast.add_argument('--workers', type=int, default=1)
+    forecast.add_argument('--reconcile', choices=['bottom_up', 'top_down', 'ols', 'mint'])
+    forecast.add_argument('--cache-dir')
+    forecast.add_argument('--store', help="Also record the forecasts as a new run in this SQLite file")
+    forecast.add_argument('--label', help="Label for the recorded run")
+    forecast.set_defaults(func=cmd_forecast)
+
+    save = commands.add_parser('save', help="Upsert a forecasts file and its history to Supabase")
+    save.add_argument('forecasts')
+    with_input(save)
+    save.add_argument('--batch-size', type=int, default=500)
+    save.add_argument('--concurrency', type=int, default=1,
+                      help="Requests in flight at once; above 1 uses the async writer with retries")
+    save.add_argument('--retries', type=int, default=5)
+    save.set_defaults(func=cmd_save)
+
+    plot = commands.add_parser('plot', help="Render a forecasts file to chart images")
+    plot.add_argument('forecasts')
+    with_input(plot)
+    plot.add_argument('--output-dir', default='charts')
+    plot.add_argument('--formats', nargs='+', choices=['png', 'svg'], default=['png'])
+    plot.add_argument('--workers', type=int, default=1)
+    plot.set_defaults(func=cmd_plot)
+
+    summary = commands.add_parser('summary', help="Print the future years of a forecasts file")
+    summary.add_argument('forecasts')
+    summary.set_defaults(func=cmd_summary)
+
+    backtest = commands.add_parser('backtest', help="Score forecasts from rolling cut-offs, optionally over a parameter grid")
+    backtest.add_argument('input')
+    backtest.add_argument('--chunksize', type=int)
+    backtest.add_argument('--engine', choices=['prophet', 'prophet_batch', 'vectorized'], default='vectorized')
+    backtest.add_argument('--grid', action='append', default=[], metavar='NAME=VALUES',
+                          help="GROWTH_PARAMS values to sweep, e.g. dampening=0.3,0.5 or growing_cap=1.2:1.25,1.25:1.3")
+    backtest.add_argument('--horizon', type=int, default=3)
+    backtest.add_argument('--min-train', type=int, default=5)
+    backtest.add_argument('--workers', type=int, default=1)
+    backtest.add_argument('--cache-dir', help="Keep raw Prophet predictions here between runs")
+    backtest.add_argument('--output', help="Write every backtest prediction to this CSV")
+    backtest.add_argument('--top', type=int, default=10, help="Parameter sets to print, best MAPE first")
+    backtest.set_defaults(func=cmd_backtest)
+
+    scenario = commands.add_parser('scenario', help="Compare a what-if forecast with the baseline")
+    scenario.add_argument('input')
+    scenario.add_argument('--chunksize', type=int)
+    scenario.add_argument('--engine', choices=['prophet', 'prophet_batch', 'vectorized'], default='prophet')
+    scenario.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                          help="Override a GROWTH_PARAMS entry, e.g. dampening=0.8 or growing_cap=1.3:1.4")
+    scenario.add_argument('--adjust', action='append', default=[], metavar='COURSE=FACTOR',
+                          help="Scale a course's forecast, e.g. BSN=1.1")
+    scenario.add_argument('--horizon', type=int, help="Years to forecast past the data")
+    scenario.add_argument('--cache-dir', help="Keep raw Prophet predictions here between runs")
+    scenario.set_defaults(func=cmd_scenario)
+
+    segments = commands.add_parser('segments', help="Forecast student counts per segment from student-level records")
+    segments.add_argument('input', help="Student CSV or Parquet file with a year, created_at or studentID column")
+    segments.add_argument('--segment', action='append', default=[], metavar='NAME=COLUMN+COLUMN',
+                          help="Segment to forecast instead of the defaults, e.g. course_sex=curricularProgram+sex")
+    segments.add_argument('--horizon', type=int, help="Years to forecast past the data")
+    segments.add_argument('--output', help="Write every segment's forecast to this Parquet file")
+    segments.set_defaults(func=cmd_segments)
+
+    history = commands.add_parser('history', help="Query forecast runs recorded with forecast --store")
+    history.add_argument('store')
+    history.add_argument('--course', help="One course across the most recent runs")
+    history.add_argument('--year', type=int, help="Every course in one year (with --course, only that year)")
+    history.add_argument('--run', type=int, help="Run to read instead of the latest")
+    history.add_argument('--runs', type=int, default=5, help="How many recent runs to list or read")
+    history.add_argument('--compare', action='store_true', help="Differences between a run and the one before it")
+    history.set_defaults(func=cmd_history)
+
+    imports = commands.add_parser('imports', help="Time importing each heavy dependency in a fresh interpreter")
+    imports.set_defaults(func=cmd_imports)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    if args.profile:
+        from . import profiling
+        profiler = profiling.enable(args.profile, trace_memory=args.profile_memory, cprofile_path=args.cprofile)
+        try:
+            args.func(args)
+        finally:
+            profiling.disable()
+            profiler.print_table()
+    else:
+        args.func(args)
+
+    if args.import_report:
+        loaded = [module for module in HEAVY_MODULES if module.split('.')[0] in sys.modules]
+        print(f"{args.command} took {time.perf_counter() - start:.3f}s; "
+              f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Layout of the exported forecasts file, one row per course and year
+FORECAST_SCHEMA = pa.schema([
+    ('course', pa.dictionary(pa.int32(), pa.string())),
+    ('year', pa.int16()),
+    ('yhat', pa.float64()),
+    ('yhat_lower', pa.float64()),
+    ('yhat_upper', pa.float64()),
+    ('is_actual', pa.bool_()),
+])
+
+
+def read_enrollment_table(path, columns=('Year', 'Course Code', 'Enrollment')):
+    """Read enrollment history from a memory-mapped Parquet or Arrow/Feather file"""
+    columns = list(columns)
+    if str(path).endswith('.parquet'):
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def forecasts_to_table(forecasts, actual_data):
+    """Stack the forecasts dict into one Arrow table.
+
+    Like build_enrollment_records, each course's history years come from
+    actual_data (its enrollment as yhat, no bounds, is_actual set) and its
+    forecast adds only the years after the last year of the data; where a
+    year appears twice in a forecast the later row is kept.
+    """
+    last_year = actual_data['Original_Year'].max()
+    courses = list(forecasts.keys())
+    position = {course: i for i, course in enumerate(courses)}
+
+    history = actual_data[actual_data['Course Code'].astype(str).isin(position)]
+    history_index = history['Course Code'].astype(str).map(position).to_numpy(dtype=np.int32)
+    history_values = history['Enrollment'].to_numpy(dtype=np.float64)
+
+    frames = [forecast.drop_duplicates(subset='year', keep='last') for forecast in forecasts.values()]
+    frames = [frame[frame['year'] > last_year] for frame in frames]
+    sizes = np.array([len(frame) for frame in frames])
+
+    def column(name, history_column):
+        return np.concatenate([history_column] + [frame[name].to_numpy(dtype=np.float64) for frame in frames])
+
+    course_index = np.concatenate([history_index, np.repeat(np.arange(len(courses), dtype=np.int32), sizes)])
+    year = column('year', history['Original_Year'].to_numpy(dtype=np.float64)).astype(np.int16)
+    no_bounds = np.full(len(history), np.nan)
+    is_actual = np.arange(len(course_index)) < len(history)
+    order = np.lexsort((year, course_index))
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(pa.array(course_index[order]), pa.array(courses, type=pa.string())),
+        pa.array(year[order]),
+        pa.array(column('yhat', history_values)[order]),
+        pa.array(column('yhat_lower', no_bounds)[order]),
+        pa.array(column('yhat_upper', no_bounds)[order]),
+        pa.array(is_actual[order]),
+    ], schema=FORECAST_SCHEMA)
+
+
+def write_forecasts_parquet(forecasts, actual_data, path):
+    """Write every forecast to a single Parquet file and return the table written"""
+    table = forecasts_to_table(forecasts, actual_data)
+    pq.write_table(table, path)
+    return table
+
+
+def read_forecasts(path, columns=None, courses=None):
+    """Read a forecasts file, memory-mapped, optionally only some columns and courses"""
+    filters = [('course', 'in', list(courses))] if courses is not None else None
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+
+def forecast_table_to_dict(table):
+    """Split a forecasts table back into {course: DataFrame} like forecast_all_courses"""
+    df = table.to_pandas()
+    return {
+        course: rows.drop(columns='course').reset_index(drop=True)
+        for course, rows in df.groupby('course', sort=False, observed=True)
+    }
+
+
+def diff_forecasts(previous_path, table):
+    """Compare a new forecasts table with the one written by the previous run.
+
+    Returns one row per (course, year) with both yhat values and their
+    difference; status is 'added', 'removed' or 'both'.
+    """
+    columns = ['course', 'year', 'yhat']
+    previous = read_forecasts(previous_path, columns=columns).to_pandas()
+    current = table.select(columns).to_pandas()
+    for df in (previous, current):
+        df['course'] = df['course'].astype(str)
+
+    diff = previous.merge(current, on=['course', 'year'], how='outer',
+                          suffixes=('_previous', '_current'), indicator='status')
+    diff['status'] = diff['status'].map({'left_only': 'removed', 'right_only': 'added', 'both': 'both'})
+    diff['delta'] = diff['yhat_current'] - diff['yhat_previous']
+    return diff.sort_values(['course', 'year'], ignore_index=True)
@@ -6,21 +6,25 @@ import datetime
 courses = ['BSCS', 'BSIT', 'BSA', 'BSBA', 'BEED', 'BSED-FIL', 'BSED-ENG', 'BSED-MATH', 'BSN', 'BSECE', 'BSHM', 'ABPSYCH']
 abpsych_start_year = 2022
 
-# Create the data
-data = []
-for year in range(2020, 2025):
-    for course in courses:
-        if course == 'ABPSYCH' and year < abpsych_start_year:
-            continue
-        applicant_count = random.randint(100, 500)
-        enrollee_count = random.randint(50, 300)
-        data.append({
-            'academic_year': f"{year}-{year+1}",
-            'course': course,
-            'applicant_count': applicant_count,
-            'enrollee_count': enrollee_count
-        })
+def generate_applicant_data(start_year=2020, end_year=2025, seed=None):
+    """Random applicant and enrollee counts per course and academic year; the same seed gives the same data"""
+    rng = random.Random(seed)
+    data = []
+    for year in range(start_year, end_year):
+        for course in courses:
+            if course == 'ABPSYCH' and year < abpsych_start_year:
+                continue
+            applicant_count = rng.randint(100, 500)
+            enrollee_count = rng.randint(50, 300)
+            data.append({
+                'academic_year': f"{year}-{year+1}",
+                'course': course,
+                'applicant_count': applicant_count,
+                'enrollee_count': enrollee_count
+            })
+    return pd.DataFrame(data)
 
-df = pd.DataFrame(data)
-df.to_csv('applicant_enrollee_sample.csv', index=False)
-print("Data saved to 'applicant_enrollee_sample.csv'")
\ No newline at end of file
+if __name__ == "__main__":
+    df = generate_applicant_data()
+    df.to_csv('applicant_enrollee_sample.csv', index=False)
+    print("Data saved to 'applicant_enrollee_sample.csv'")
@@ -1,160 +1,171 @@
-import random
+import argparse
 import csv
+import os
+import random
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Names the email addresses are built from
+FIRST_NAMES = [
+    'james', 'john', 'robert', 'michael', 'william', 'david', 'richard', 'joseph',
+    'thomas', 'charles', 'christopher', 'daniel', 'matthew', 'anthony', 'donald',
+    'mary', 'patricia', 'jennifer', 'linda', 'elizabeth', 'barbara', 'susan',
+    'jessica', 'sarah', 'karen', 'lisa', 'nancy', 'betty', 'margaret', 'sandra',
+    'ashley', 'emma', 'olivia', 'ava', 'sophia', 'isabella', 'mia', 'charlotte',
+    'amelia', 'harper', 'evelyn', 'abigail', 'emily', 'ella', 'elizabeth',
+    'noah', 'liam', 'mason', 'jacob', 'william', 'ethan', 'oliver', 'lucas'
+]
+
+LAST_NAMES = [
+    'smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller', 'davis',
+    'rodriguez', 'martinez', 'hernandez', 'lopez', 'gonzalez', 'wilson', 'anderson',
+    'thomas', 'taylor', 'moore', 'jackson', 'martin', 'lee', 'perez', 'thompson',
+    'white', 'harris', 'sanchez', 'clark', 'ramirez', 'lewis', 'robinson', 'walker',
+    'young', 'allen', 'king', 'wright', 'scott', 'torres', 'nguyen', 'hill', 'flores',
+    'green', 'adams', 'nelson', 'baker', 'hall', 'rivera', 'campbell', 'mitchell'
+]
+
+# Basic Demographics
+AGE_RANGES = [
+    'below 18 years old', '18 years old', '19 years old', '20 years old',
+    '21 years old', '22 years old', '23 years old', '24 years old',
+    '25 years old and above'
+]
+
+CIVIL_STATUS_OPTIONS = [
+    'Single', 'Married', 'Widower', 'Separated', 'Single Parent',
+    'Living with Partner'
+]
+
+YEARS_IN_PASIG_RANGES = [
+    'less than 1 year', '1 - 5 years', '6 - 10 years', '11 - 15 years',
+    '16 - 20 years', '21 - 25 years', '26 years and above'
+]
+
+# Define Pasig barangays
+PASIG_BARANGAYS = [
+    'Bagong Ilog', 'Bagong Katipunan', 'Bambang', 'Buting', 'Caniogan',
+    'Dela Paz', 'Kalawaan', 'Kapasigan', 'Kapitolyo', 'Malinao',
+    'Manggahan', 'Maybunga', 'Oranbo', 'Palatiw', 'Pinagbuhatan', 'Pineda',
+    'Rosario', 'Sagad', 'San Antonio', 'San Joaquin', 'San Jose', 'San Miguel',
+    'San Nicolas', 'Santa Cruz', 'Santa Lucia', 'Santa Rosa', 'Santo Tomas',
+    'Santolan', 'Sumilang', 'Ugong'
+]
+
+# Non-Pasig locations
+OTHER_LOCATIONS = [
+    'Cainta', 'Taytay', 'Taguig City', 'Pateros', 'Antipolo', 'Marikina City',
+    'Binangonan', 'Mandaluyong City', 'Montalban, Rizal', 'Quezon City',
+    'Bulacan', 'Catanduanes', 'Cavite', 'Teresa'
+]
+
+INCOME_RANGES = [
+    'Less than Php9,520',
+    'Between Php9,520 to Php21,194',
+    'Between Php21,195 to Php43,838',
+    'Between Php43,839 to Php76,669',
+    'Between Php76,670 to Php131,484',
+    'Between Php131,485 to Php219,140',
+    'From Php219,140 and up'
+]
 
-def generate_random_emails(count=100):
+RELIGIONS = [
+    'Roman Catholic', 'Born - Again Christian', 'Iglesia Ni Cristo', 'Islam',
+    'Jehovah\'s Witness', 'Baptist', 'Seventh-Day Adventist',
+    'Members Church of God International', 'Protestant/Pentecostal', 'Methodist',
+    'LDS Mormon', 'Aglipay', 'Atheist', 'No Religion',
+    'The Church of Jesus Christ of Latter-Day Saints', 'Agnostic',
+    'World Mission Society Church of God', 'Undetermined'
+]
+
+CURRICULAR_PROGRAMS = [
+    'BSCS', 'BSIT', 'BSA', 'BSBA', 'BEED', 'BSED-FIL', 'BSED-ENG',
+    'BSED-MATH', 'BSN', 'BSECE', 'BSHM', 'ABPSYCH'
+]
+
+SHS_STRANDS = ['ABM', 'STEM', 'HUMSS', 'GAS', 'Sports Track', 'TVL Track']
+
+PROBABILITIES = {
+    'lgbtqia': 0.1,
+    'pasigueno': 0.7,
+    'irregular': 0.3,
+    'working_student': 0.25,
+    'deans_lister': 0.15,
+    'presidents_lister': 0.05,
+    'private_school': 0.4,
+    'pwd': 0.05
+}
+
+
+def generate_random_emails(count=100, rng=None):
     """Generate random Gmail addresses using combinations of first and last names."""
-    first_names = [
-        'james', 'john', 'robert', 'michael', 'william', 'david', 'richard', 'joseph',
-        'thomas', 'charles', 'christopher', 'daniel', 'matthew', 'anthony', 'donald',
-        'mary', 'patricia', 'jennifer', 'linda', 'elizabeth', 'barbara', 'susan',
-        'jessica', 'sarah', 'karen', 'lisa', 'nancy', 'betty', 'margaret', 'sandra',
-        'ashley', 'emma', 'olivia', 'ava', 'sophia', 'isabella', 'mia', 'charlotte',
-        'amelia', 'harper', 'evelyn', 'abigail', 'emily', 'ella', 'elizabeth',
-        'noah', 'liam', 'mason', 'jacob', 'william', 'ethan', 'oliver', 'lucas'
-    ]
-    
-    last_names = [
-        'smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller', 'davis',
-        'rodriguez', 'martinez', 'hernandez', 'lopez', 'gonzalez', 'wilson', 'anderson',
-        'thomas', 'taylor', 'moore', 'jackson', 'martin', 'lee', 'perez', 'thompson',
-        'white', 'harris', 'sanchez', 'clark', 'ramirez', 'lewis', 'robinson', 'walker',
-        'young', 'allen', 'king', 'wright', 'scott', 'torres', 'nguyen', 'hill', 'flores',
-        'green', 'adams', 'nelson', 'baker', 'hall', 'rivera', 'campbell', 'mitchell'
-    ]
-    
+    rng = rng or random.Random()
     emails = set()
     while len(emails) < count:
-        first = random.choice(first_names)
-        last = random.choice(last_names)
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
         
-        pattern = random.randint(1, 3)
+        pattern = rng.randint(1, 3)
         if pattern == 1:
             email = f"{first}.{last}@gmail.com"
         elif pattern == 2:
             email = f"{first[0]}.{last}@gmail.com"
         else:
-            email = f"{first}.{last}{random.randint(1, 999)}@gmail.com"
+            email = f"{first}.{last}{rng.randint(1, 999)}@gmail.com"
         
         emails.add(email.lower())
     
     return sorted(list(emails))
 
-def generate_user_data(count=100):
+def generate_user_data(count=100, seed=None):
     """
     Generate comprehensive student data including email, demographics, location,
-    education, financial information, and academic status.
+    education, financial information, and academic status. The same seed
+    always gives the same students.
     """
-    emails = generate_random_emails(count)
-    
-    # Basic Demographics
-    age_ranges = [
-        'below 18 years old', '18 years old', '19 years old', '20 years old',
-        '21 years old', '22 years old', '23 years old', '24 years old',
-        '25 years old and above'
-    ]
-    
-    civil_status_options = [
-        'Single', 'Married', 'Widower', 'Separated', 'Single Parent',
-        'Living with Partner'
-    ]
-    
-    years_in_pasig_ranges = [
-        'less than 1 year', '1 - 5 years', '6 - 10 years', '11 - 15 years',
-        '16 - 20 years', '21 - 25 years', '26 years and above'
-    ]
-    
-    # Define Pasig barangays
-    pasig_barangays = [
-        'Bagong Ilog', 'Bagong Katipunan', 'Bambang', 'Buting', 'Caniogan',
-        'Dela Paz', 'Kalawaan', 'Kapasigan', 'Kapitolyo', 'Malinao',
-        'Manggahan', 'Maybunga', 'Oranbo', 'Palatiw', 'Pinagbuhatan', 'Pineda',
-        'Rosario', 'Sagad', 'San Antonio', 'San Joaquin', 'San Jose', 'San Miguel',
-        'San Nicolas', 'Santa Cruz', 'Santa Lucia', 'Santa Rosa', 'Santo Tomas',
-        'Santolan', 'Sumilang', 'Ugong'
-    ]
-    
-    # Non-Pasig locations
-    other_locations = [
-        'Cainta', 'Taytay', 'Taguig City', 'Pateros', 'Antipolo', 'Marikina City',
-        'Binangonan', 'Mandaluyong City', 'Montalban, Rizal', 'Quezon City',
-        'Bulacan', 'Catanduanes', 'Cavite', 'Teresa'
-    ]
-
-    income_ranges = [
-        'Less than Php9,520',
-        'Between Php9,520 to Php21,194',
-        'Between Php21,195 to Php43,838',
-        'Between Php43,839 to Php76,669',
-        'Between Php76,670 to Php131,484',
-        'Between Php131,485 to Php219,140',
-        'From Php219,140 and up'
-    ]
-
-    religions = [
-        'Roman Catholic', 'Born - Again Christian', 'Iglesia Ni Cristo', 'Islam',
-        'Jehovah\'s Witness', 'Baptist', 'Seventh-Day Adventist',
-        'Members Church of God International', 'Protestant/Pentecostal', 'Methodist',
-        'LDS Mormon', 'Aglipay', 'Atheist', 'No Religion',
-        'The Church of Jesus Christ of Latter-Day Saints', 'Agnostic',
-        'World Mission Society Church of God', 'Undetermined'
-    ]
-
-    curricular_programs = [
-        'BSCS', 'BSIT', 'BSA', 'BSBA', 'BEED', 'BSED-FIL', 'BSED-ENG',
-        'BSED-MATH', 'BSN', 'BSECE', 'BSHM', 'ABPSYCH'
-    ]
-
-    shs_strands = ['ABM', 'STEM', 'HUMSS', 'GAS', 'Sports Track', 'TVL Track']
-    
-    probabilities = {
-        'lgbtqia': 0.1,
-        'pasigueno': 0.7,
-        'irregular': 0.3,
-        'working_student': 0.25,
-        'deans_lister': 0.15,
-        'presidents_lister': 0.05,
-        'private_school': 0.4,
-        'pwd': 0.05
-    }
+    rng = random.Random(seed)
+    emails = generate_random_emails(count, rng)
     
     users = []
     
     for email in emails:
-        sex = random.choice(['Male', 'Female'])
-        is_lgbtqia = 'Yes' if random.random() < probabilities['lgbtqia'] else 'No'
-        age = random.choice(age_ranges)
-        civil_status = random.choice(civil_status_options)
+        sex = rng.choice(['Male', 'Female'])
+        is_lgbtqia = 'Yes' if rng.random() < PROBABILITIES['lgbtqia'] else 'No'
+        age = rng.choice(AGE_RANGES)
+        civil_status = rng.choice(CIVIL_STATUS_OPTIONS)
         
         # First determine if they should be a Pasigueno based on probability
-        initial_is_pasigueno = 'Yes' if random.random() < probabilities['pasigueno'] else 'No'
+        initial_is_pasigueno = 'Yes' if rng.random() < PROBABILITIES['pasigueno'] else 'No'
         
         # Select barangay based on Pasigueno status
         if initial_is_pasigueno == 'Yes':
-            barangay = random.choice(pasig_barangays)
+            barangay = rng.choice(PASIG_BARANGAYS)
             is_pasigueno = 'Yes'  # This is definitely a Pasig resident
-            years_in_pasig = random.choice(years_in_pasig_ranges)
+            years_in_pasig = rng.choice(YEARS_IN_PASIG_RANGES)
         else:
-            barangay = random.choice(other_locations)
+            barangay = rng.choice(OTHER_LOCATIONS)
             is_pasigueno = 'No'  # This is definitely not a Pasig resident
             years_in_pasig = 'less than 1 year'
         
-        family_monthly_income = random.choice(income_ranges)
-        religion = random.choice(religions)
-        curricular_program = random.choice(curricular_programs)
-        academic_status = 'Irregular' if random.random() < probabilities['irregular'] else 'Regular'
-        working_student = 'Yes' if random.random() < probabilities['working_student'] else 'No'
+        family_monthly_income = rng.choice(INCOME_RANGES)
+        religion = rng.choice(RELIGIONS)
+        curricular_program = rng.choice(CURRICULAR_PROGRAMS)
+        academic_status = 'Irregular' if rng.random() < PROBABILITIES['irregular'] else 'Regular'
+        working_student = 'Yes' if rng.random() < PROBABILITIES['working_student'] else 'No'
         
-        random_val = random.random()
+        random_val = rng.random()
         deans_lister = 'No'
         presidents_lister = 'No'
-        if random_val < probabilities['presidents_lister']:
+        if random_val < PROBABILITIES['presidents_lister']:
             presidents_lister = 'Yes'
-        elif random_val < probabilities['presidents_lister'] + probabilities['deans_lister']:
+        elif random_val < PROBABILITIES['presidents_lister'] + PROBABILITIES['deans_lister']:
             deans_lister = 'Yes'
         
-        feeder_school = 'Private' if random.random() < probabilities['private_school'] else 'Public'
-        strand_in_shs = random.choice(shs_strands)
-        is_pwd = 'Yes' if random.random() < probabilities['pwd'] else 'No'
+        feeder_school = 'Private' if rng.random() < PROBABILITIES['private_school'] else 'Public'
+        strand_in_shs = rng.choice(SHS_STRANDS)
+        is_pwd = 'Yes' if rng.random() < PROBABILITIES['pwd'] else 'No'
         
         user = {
             'email': email,
@@ -180,25 +191,238 @@ def generate_user_data(count=100):
     
     return users
 
+# Column order of the generated student rows
+STUDENT_COLUMNS = [
+    'email', 'sex', 'isLGBTQIA', 'age', 'civilStatus', 'isPasigueno', 'yearsInPasig',
+    'barangay', 'familyMonthlyIncome', 'religion', 'curricularProgram', 'academicStatus',
+    'workingStudent', 'deansLister', 'presidentsLister', 'feederSchool', 'strandInSHS', 'isPWD'
+]
+
+
+def _choice(rng, options, size):
+    """Uniform draw from options as a Categorical, like random.choice per row"""
+    return pd.Categorical.from_codes(rng.integers(len(options), size=size), categories=options)
+
+
+def _flag(rng, probability, size, yes='Yes', no='No'):
+    return pd.Categorical.from_codes((rng.random(size) < probability).astype(np.int8), categories=[no, yes])
+
+
+def _batch_emails(rng, start, size):
+    """Gmail addresses that are unique by construction.
+
+    Names and the first.last / f.last pattern are drawn at random, and the
+    row's position in the whole dataset is appended, so no two rows share
+    an address and nothing has to be redrawn.
+    """
+    firsts = np.array(sorted(set(FIRST_NAMES)), dtype=object)
+    lasts = np.array(LAST_NAMES, dtype=object)
+    first = firsts[rng.integers(len(firsts), size=size)]
+    initial = np.array([name[0] for name in firsts], dtype=object)[rng.integers(len(firsts), size=size)]
+    last = lasts[rng.integers(len(lasts), size=size)]
+    prefix = np.where(rng.random(size) < 2 / 3, first, initial)
+    number = np.arange(start + 1, start + size + 1).astype(str).astype(object)
+    return prefix + '.' + last + number + '@gmail.com'
+
+
+def generate_student_batch(size, rng=None, start=0):
+    """Generate size students as a DataFrame with NumPy draws, one column at a time.
+
+    Follows the same rules as generate_user_data: non-Pasiguenos get a
+    non-Pasig location and 'less than 1 year' in Pasig, and one draw
+    decides between president's lister, dean's lister or neither. start
+    is the position of the first row in the whole dataset, which keeps
+    emails unique across batches. Categorical columns keep memory small.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    is_pasig = rng.random(size) < PROBABILITIES['pasigueno']
+    barangay = np.where(is_pasig,
+                        rng.integers(len(PASIG_BARANGAYS), size=size),
+                        len(PASIG_BARANGAYS) + rng.integers(len(OTHER_LOCATIONS), size=size))
+    # YEARS_IN_PASIG_RANGES[0] is 'less than 1 year'
+    years_in_pasig = np.where(is_pasig, rng.integers(len(YEARS_IN_PASIG_RANGES), size=size), 0)
+
+    lister = rng.random(size)
+    presidents = lister < PROBABILITIES['presidents_lister']
+    deans = ~presidents & (lister < PROBABILITIES['presidents_lister'] + PROBABILITIES['deans_lister'])
+    yes_no = ['No', 'Yes']
+
+    return pd.DataFrame({
+        'email': _batch_emails(rng, start, size),
+        'sex': _choice(rng, ['Male', 'Female'], size),
+        'isLGBTQIA': _flag(rng, PROBABILITIES['lgbtqia'], size),
+        'age': _choice(rng, AGE_RANGES, size),
+        'civilStatus': _choice(rng, CIVIL_STATUS_OPTIONS, size),
+        'isPasigueno': pd.Categorical.from_codes(is_pasig.astype(np.int8), categories=yes_no),
+        'yearsInPasig': pd.Categorical.from_codes(years_in_pasig, categories=YEARS_IN_PASIG_RANGES),
+        'barangay': pd.Categorical.from_codes(barangay, categories=PASIG_BARANGAYS + OTHER_LOCATIONS),
+        'familyMonthlyIncome': _choice(rng, INCOME_RANGES, size),
+        'religion': _choice(rng, RELIGIONS, size),
+        'curricularProgram': _choice(rng, CURRICULAR_PROGRAMS, size),
+        'academicStatus': _flag(rng, PROBABILITIES['irregular'], size, yes='Irregular', no='Regular'),
+        'workingStudent': _flag(rng, PROBABILITIES['working_student'], size),
+        'deansLister': pd.Categorical.from_codes(deans.astype(np.int8), categories=yes_no),
+        'presidentsLister': pd.Categorical.from_codes(presidents.astype(np.int8), categories=yes_no),
+        'feederSchool': _flag(rng, PROBABILITIES['private_school'], size, yes='Private', no='Public'),
+        'strandInSHS': _choice(rng, SHS_STRANDS, size),
+        'isPWD': _flag(rng, PROBABILITIES['pwd'], size),
+    }, columns=STUDENT_COLUMNS)
+
+
+# Rows drawn from one RNG stream; shard boundaries fall on multiples of this
+BLOCK_SIZE = 100_000
+
+
+def block_rng(seed, block):
+    """Counter-based RNG stream for one block of rows.
+
+    Philox is keyed on the seed and the block number sits in the top word
+    of its counter, so every block has its own non-overlapping stream that
+    can be created directly in any process, without drawing the earlier
+    blocks first.
+    """
+    return np.random.Generator(np.random.Philox(key=seed, counter=[0, 0, 0, block]))
+
+
+def generate_students(count, seed, first_block=0, last_block=None, block_size=BLOCK_SIZE):
+    """Yield the blocks of a count-student dataset as DataFrames, one per block.
+
+    Block b always holds rows [b * block_size, (b + 1) * block_size) drawn
+    from block_rng(seed, b), so any range of blocks comes out identical
+    whether it is generated alone or as part of the whole dataset.
+    """
+    num_blocks = -(-count // block_size)
+    last_block = num_blocks if last_block is None else min(last_block, num_blocks)
+    for block in range(first_block, last_block):
+        start = block * block_size
+        yield generate_student_batch(min(block_size, count - start), block_rng(seed, block), start)
+
+
+def shard_blocks(count, shards, block_size=BLOCK_SIZE):
+    """Split the blocks of a count-student dataset into shards contiguous (first, last) ranges"""
+    num_blocks = -(-count // block_size)
+    bounds = np.linspace(0, num_blocks, shards + 1).round().astype(int)
+    return [(int(first), int(last)) for first, last in zip(bounds[:-1], bounds[1:])]
+
+
+def _open_writer(path, schema):
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    if str(path).endswith('.parquet'):
+        return pq.ParquetWriter(path, schema)
+    return pa_csv.CSVWriter(path, schema, write_options=pa_csv.WriteOptions(quoting_style='needed'))
+
+
+def write_students(path, count, seed=0, first_block=0, last_block=None, block_size=BLOCK_SIZE):
+    """Stream generated students to a CSV or .parquet file, one block at a time.
+
+    Only one block is held in memory, so the file size is not limited by RAM.
+    Both formats are written with pyarrow straight from the categorical
+    codes, which is several times faster than DataFrame.to_csv. Returns
+    the number of rows written.
+    """
+    import pyarrow as pa
+
+    writer = None
+    rows = 0
+    try:
+        for batch in generate_students(count, seed, first_block, last_block, block_size):
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = _open_writer(path, table.schema)
+            writer.write_table(table)
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_shard(task):
+    return write_students(*task)
+
+
+def write_students_sharded(path, count, seed=0, shards=1, workers=1, block_size=BLOCK_SIZE):
+    """Generate count students as shards in parallel processes and combine them into path.
+
+    Each shard writes its blocks to its own <name>.part<N><ext> file, and the parts are
+    then appended in order, so the result is the same file write_students
+    produces for the same seed in a single process.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    root, ext = os.path.splitext(path)
+    parts = [f"{root}.part{i:05d}{ext}" for i in range(shards)]
+    tasks = [(part, count, seed, first, last, block_size)
+             for part, (first, last) in zip(parts, shard_blocks(count, shards, block_size))]
+
+    if workers == 1:
+        list(map(_write_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_shard, tasks))
+
+    combine_shards([part for part in parts if os.path.exists(part)], path)
+    for part in parts:
+        if os.path.exists(part):
+            os.remove(part)
+    return count
+
+
+def combine_shards(parts, path):
+    """Concatenate shard files in order: Parquet row groups are copied, CSV headers dropped"""
+    if str(path).endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                shard = pq.ParquetFile(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, shard.schema_arrow)
+                for group in range(shard.num_row_groups):
+                    writer.write_table(shard.read_row_group(group))
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(path, 'wb') as out:
+        for i, part in enumerate(parts):
+            with open(part, 'rb') as f:
+                if i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic student profiles")
+    parser.add_argument('count', type=int, nargs='?', default=2534)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="students_ecological_profile_sample.csv",
+                        help="CSV file, or a .parquet file")
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--legacy', action='store_true',
+                        help="Use the original one-student-at-a-time generator")
+    args = parser.parse_args(argv)
+
+    if args.legacy:
+        users = generate_user_data(args.count, seed=args.seed)
+        with open(args.output, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(users[0].keys()))
+            writer.writeheader()
+            writer.writerows(users)
+    elif args.shards > 1:
+        write_students_sharded(args.output, args.count, args.seed, args.shards, args.workers)
+    else:
+        write_students(args.output, args.count, args.seed)
+
+    print(f"Successfully generated {args.count} student records and saved to {args.output}")
+
+
 if __name__ == "__main__":
-    # Generate 2534 users
-    users = generate_user_data(2534)
-    
-    # Define the CSV filename
-    filename = "students_ecological_profile_sample.csv"
-    
-    # Write to CSV file
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        # Get the headers from the first user dictionary
-        headers = list(users[0].keys())
-        
-        # Create CSV writer
-        writer = csv.DictWriter(csvfile, fieldnames=headers)
-        
-        # Write the headers
-        writer.writeheader()
-        
-        # Write all user data
-        writer.writerows(users)
-    
-    print(f"Successfully generated {len(users)} student records and saved to {filename}")
\ No newline at end of file
+    main()
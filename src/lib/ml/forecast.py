@@ -1,15 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
 import pandas as pd
 import os
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase.client import create_client, Client
 
-from .model import forecast_all_courses, load_and_prepare_data
+if TYPE_CHECKING:
+    from supabase.client import Client
+
+from . import profiling
+from .cache import ForecastCache
+from .model import FORECAST_END_YEAR, forecast_all_courses, load_and_prepare_data
+from .results import ForecastResults
 
 # Load environment variables
 load_dotenv()
 
 def get_supabase_client() -> Client:
     """Create a Supabase client"""
+    # supabase is slow to import, so only runs that talk to the database load it
+    from supabase.client import create_client
+    
     url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
     key = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
     
@@ -53,61 +65,167 @@ def save_enrollment_data(supabase: Client, course_code: str, year: int, enrollme
         print(f"Error saving enrollment data for course {course_code}, year {year}: {str(e)}")
         raise
 
-def save_forecast_to_db(forecasts: dict, actual_data: pd.DataFrame):
-    """Save all forecasts and historical data to Supabase"""
-    supabase = get_supabase_client()
+def build_enrollment_records(forecasts: dict, actual_data: pd.DataFrame) -> pd.DataFrame:
+    """Build every EnrollmentData row (history and future forecasts) as one frame"""
+    last_year = actual_data['Original_Year'].max()
     
-    try:
-        # Save historical data with error handling for each record
-        for _, row in actual_data.iterrows():
-            try:
-                save_enrollment_data(
-                    supabase=supabase,
-                    course_code=row['Course Code'],
-                    year=row['Original_Year'],
-                    enrollment=row['Enrollment'],
-                    is_actual=True
-                )
-            except Exception as e:
-                print(f"Failed to save historical data for {row['Course Code']}: {str(e)}")
-                continue
-        
-        # Save forecast data with error handling for each record
-        for course, forecast in forecasts.items():
-            future_data = forecast[forecast['year'] > actual_data['Original_Year'].max()]
+    actual = pd.DataFrame({
+        "courseCode": actual_data['Course Code'].astype(str),
+        "year": actual_data['Original_Year'].astype(int),
+        "enrollment": actual_data['Enrollment'].astype(float),
+        "isActual": True,
+        "lowerBound": np.nan,
+        "upperBound": np.nan
+    })
+    
+    if isinstance(forecasts, ForecastResults):
+        # Already one block: a single long frame instead of a concat per course
+        predictions = forecasts.to_frame().rename(columns={'course': 'courseCode'})
+        predictions['courseCode'] = predictions['courseCode'].astype(str)
+    else:
+        predictions = pd.concat(
+            [forecast[['year', 'yhat', 'yhat_lower', 'yhat_upper']] for forecast in forecasts.values()],
+            keys=list(forecasts.keys()),
+            names=['courseCode', None]
+        ).reset_index(level='courseCode')
+    predictions = predictions[predictions['year'] > last_year]
+    
+    future = pd.DataFrame({
+        "courseCode": predictions['courseCode'],
+        "year": predictions['year'].astype(int),
+        "enrollment": predictions['yhat'].astype(float),
+        "isActual": False,
+        "lowerBound": predictions['yhat_lower'].astype(float),
+        "upperBound": predictions['yhat_upper'].astype(float)
+    })
+    
+    records = pd.concat([actual, future], ignore_index=True)
+    # A single upsert can't touch the same (courseCode, year) twice
+    return records.drop_duplicates(subset=['courseCode', 'year'], keep='last')
+
+def save_records_in_batches(supabase: Client, records: pd.DataFrame, batch_size: int = 500,
+                            table: str = 'EnrollmentData', on_conflict: str = 'courseCode,year') -> dict:
+    """Upsert records in chunks on the on_conflict key.
+    
+    Requires a unique constraint on ("courseCode", "year") in EnrollmentData
+    (or on the on_conflict columns of another table).
+    A failed batch is reported and skipped; the remaining batches still run.
+    """
+    rows = records.astype(object).where(records.notna(), None).to_dict('records')
+    failed_batches = []
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            with profiling.stage('db_batch', table=table, start=start, rows=len(batch)):
+                result = supabase.table(table)\
+                    .upsert(batch, on_conflict=on_conflict)\
+                    .execute()
             
-            for _, row in future_data.iterrows():
-                try:
-                    save_enrollment_data(
-                        supabase=supabase,
-                        course_code=course,
-                        year=int(row['year']),
-                        enrollment=row['yhat'],
-                        is_actual=False,
-                        lower_bound=row['yhat_lower'],
-                        upper_bound=row['yhat_upper']
-                    )
-                except Exception as e:
-                    print(f"Failed to save forecast data for {course}: {str(e)}")
-                    continue
+            if hasattr(result, 'error') and result.error:
+                raise Exception(f"Error saving data: {result.error}")
+                
+        except Exception as e:
+            print(f"Failed to save rows {start}-{start + len(batch) - 1}: {str(e)}")
+            failed_batches.append({"start": start, "size": len(batch), "error": str(e)})
+    
+    return {
+        "rows": len(rows),
+        "batches": -(-len(rows) // batch_size),
+        "failed_batches": failed_batches,
+        "failed_rows": sum(batch["size"] for batch in failed_batches)
+    }
+
+def save_forecast_to_db(forecasts: dict, actual_data: pd.DataFrame, batch_size: int = 500,
+                        supabase: Client = None) -> dict:
+    """Save all forecasts and historical data to Supabase in batched upserts"""
+    if supabase is None:
+        supabase = get_supabase_client()
+    
+    try:
+        records = build_enrollment_records(forecasts, actual_data)
+        return save_records_in_batches(supabase, records, batch_size=batch_size)
                 
     except Exception as e:
         print(f"Error in save_forecast_to_db: {str(e)}")
         raise
 
 def main():
+    # Per-stage timings as JSON lines, plus optional tracemalloc peaks and a cProfile dump
+    profile_path = os.getenv("FORECAST_PROFILE")
+    if profile_path:
+        profiler = profiling.enable(profile_path, trace_memory=bool(os.getenv("FORECAST_PROFILE_MEMORY")),
+                                    cprofile_path=os.getenv("FORECAST_PROFILE_CPROFILE"))
     try:
-        excel_path = r'C:\Users\acer\Desktop\plp-enrollment-insights-dashboardd\src\lib\ml\data\EnrollmentData.csv'
-        df = load_and_prepare_data(excel_path)
-        forecasts = forecast_all_courses(df)
+        excel_path = os.getenv("FORECAST_INPUT", r'C:\Users\acer\Desktop\plp-enrollment-insights-dashboardd\src\lib\ml\data\EnrollmentData.csv')
+        chunksize = os.getenv("FORECAST_CHUNKSIZE")
+        df = load_and_prepare_data(excel_path, chunksize=int(chunksize) if chunksize else None)
+        workers = int(os.getenv("FORECAST_WORKERS", "1"))
+        cache = ForecastCache(os.getenv("FORECAST_CACHE_DIR", os.path.join(os.path.dirname(__file__), '.forecast_cache')))
+        engine = os.getenv("FORECAST_ENGINE", "prophet")
+        batch_size = int(os.getenv("FORECAST_BATCH_SIZE", "500"))
+        
+        # Incremental runs only refit and save the courses that changed
+        if os.getenv("FORECAST_INCREMENTAL") or os.getenv("FORECAST_DRY_RUN"):
+            from .incremental import run_incremental
+            manifest_path = os.getenv("FORECAST_MANIFEST", os.path.join(os.path.dirname(__file__), '.forecast_manifest.json'))
+            run_incremental(df, manifest_path, dry_run=bool(os.getenv("FORECAST_DRY_RUN")),
+                            batch_size=batch_size, workers=workers, cache=cache, engine=engine)
+            return
+        
+        # Stored models are reused or warm-started instead of fitting from scratch
+        model_dir = os.getenv("FORECAST_MODEL_DIR")
+        if model_dir:
+            from .model_store import ModelStore, forecast_all_courses_warm
+            end_year = int(os.getenv("FORECAST_END_YEAR", str(FORECAST_END_YEAR)))
+            forecasts = forecast_all_courses_warm(df, ModelStore(model_dir), end_year=end_year)
+        else:
+            forecasts = forecast_all_courses(df, workers=workers, cache=cache, engine=engine,
+                                             reconcile=os.getenv("FORECAST_RECONCILE") or None)
+            print(f"Forecast cache: {cache.stats()}")
+        
+        # Optionally keep a columnar copy of every forecast next to the database
+        parquet_path = os.getenv("FORECAST_PARQUET_OUTPUT")
+        if parquet_path:
+            from .columnar import diff_forecasts, write_forecasts_parquet
+            previous_path = f"{parquet_path}.previous"
+            if os.path.exists(parquet_path):
+                os.replace(parquet_path, previous_path)
+            table = write_forecasts_parquet(forecasts, df, parquet_path)
+            if os.path.exists(previous_path):
+                diff = diff_forecasts(previous_path, table)
+                changed = diff[(diff['status'] != 'both') | (diff['delta'].abs() > 1e-9)]
+                print(f"{len(changed)} forecast rows changed since the previous run")
+        
+        # Keep every run in a local SQLite store for comparison and fast lookups
+        store_path = os.getenv("FORECAST_STORE")
+        if store_path:
+            from .forecast_store import ForecastStore
+            with ForecastStore(store_path) as store:
+                run = store.record_run(forecasts, engine=engine, history_end=df['Original_Year'].max())
+            print(f"Recorded forecast run {run} in {store_path}")
         
-        # Save the data to Supabase
-        save_forecast_to_db(forecasts, df)
-        print("Successfully saved forecasts to Supabase")
+        # Save the data to Supabase, several batches in flight at once when asked
+        concurrency = int(os.getenv("FORECAST_DB_CONCURRENCY", "1"))
+        if concurrency > 1:
+            from .async_writer import print_save_report, save_forecast_concurrently
+            report = save_forecast_concurrently(forecasts, df, batch_size=batch_size, concurrency=concurrency,
+                                                retries=int(os.getenv("FORECAST_DB_RETRIES", "5")))
+            print_save_report(report)
+            return
+        report = save_forecast_to_db(forecasts, df, batch_size=batch_size)
+        if report["failed_batches"]:
+            print(f"Saved forecasts with {report['failed_rows']} of {report['rows']} rows failing")
+        else:
+            print(f"Successfully saved {report['rows']} rows to Supabase in {report['batches']} requests")
         
     except Exception as e:
         print(f"Error in main function: {str(e)}")
         raise
+    finally:
+        if profile_path:
+            profiling.disable()
+            profiler.print_table()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
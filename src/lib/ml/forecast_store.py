@@ -0,0 +1,212 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from .results import RESULT_COLUMNS, ForecastResults
+
+# Forecast rows are clustered on (course, run, year), which serves "one
+# course across runs" directly; the (run, year) index serves "every course
+# in one year" without a scan
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    engine TEXT,
+    params TEXT,
+    history_end INTEGER
+);
+CREATE TABLE IF NOT EXISTS courses (
+    course_id INTEGER PRIMARY KEY,
+    course TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS run_courses (
+    run INTEGER NOT NULL REFERENCES runs(run) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    course_id INTEGER NOT NULL REFERENCES courses(course_id),
+    PRIMARY KEY (run, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS forecasts (
+    run INTEGER NOT NULL REFERENCES runs(run) ON DELETE CASCADE,
+    course_id INTEGER NOT NULL REFERENCES courses(course_id),
+    year INTEGER NOT NULL,
+    yhat REAL NOT NULL,
+    yhat_lower REAL,
+    yhat_upper REAL,
+    PRIMARY KEY (course_id, run, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS forecasts_run_year ON forecasts (run, year);
+"""
+
+QUERY_COLUMNS = ['run', 'course', 'year'] + RESULT_COLUMNS[1:]
+
+
+class ForecastStore:
+    """Forecast runs kept in a local SQLite file, indexed on (run, course, year).
+
+    Every record_run adds a new version; older runs stay until prune drops
+    them, so runs can be compared. Lookups by run and year or by course
+    across runs are B-tree range reads that return only the matching rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _course_ids(self, courses):
+        self.connection.executemany('INSERT OR IGNORE INTO courses (course) VALUES (?)',
+                                    ((course,) for course in courses))
+        ids = dict(self.connection.execute('SELECT course, course_id FROM courses'))
+        return [ids[course] for course in courses]
+
+    def _query(self, sql, parameters=()):
+        return pd.DataFrame(self.connection.execute(sql, parameters).fetchall(), columns=QUERY_COLUMNS)
+
+    def record_run(self, forecasts, label=None, engine=None, params=None, history_end=None):
+        """Store forecasts (a ForecastResults or {course: frame} dict) as a new run and return its number.
+
+        A year that appears twice in a course's forecast (the last history
+        year) keeps its last row, as the other exports do.
+        """
+        results = ForecastResults.from_forecasts(forecasts)
+        courses = [str(course) for course in results.courses]
+        with self.connection:
+            run = self.connection.execute(
+                'INSERT INTO runs (created_at, label, engine, params, history_end) VALUES (?, ?, ?, ?, ?)',
+                (datetime.now(timezone.utc).isoformat(), label, engine,
+                 json.dumps(params, sort_keys=True) if params is not None else None,
+                 int(history_end) if history_end is not None else None)
+            ).lastrowid
+            course_ids = self._course_ids(courses)
+            self.connection.executemany('INSERT INTO run_courses (run, position, course_id) VALUES (?, ?, ?)',
+                                        ((run, position, course_id) for position, course_id in enumerate(course_ids)))
+
+            ids = np.repeat(np.asarray(course_ids, dtype=np.int64), np.diff(results.offsets))
+            year = results.block[0].astype(np.int64)
+            # Keep the last row of each (course, year), then insert in primary key order
+            last = np.ones(len(ids), dtype=bool)
+            last[:-1] = (ids[1:] != ids[:-1]) | (year[1:] != year[:-1])
+            order = np.lexsort((year[last], ids[last]))
+            yhat, lower, upper = results.block[1:, last][:, order].astype(np.float64)
+            rows = zip(ids[last][order].tolist(), repeat(run), year[last][order].tolist(), yhat.tolist(),
+                       lower.tolist(), upper.tolist())
+            self.connection.executemany(
+                'INSERT INTO forecasts (course_id, run, year, yhat, yhat_lower, yhat_upper) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return run
+
+    def runs(self, limit=None):
+        """Stored runs, newest first"""
+        sql = 'SELECT run, created_at, label, engine, params, history_end FROM runs ORDER BY run DESC'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return pd.DataFrame(self.connection.execute(sql).fetchall(),
+                            columns=['run', 'created_at', 'label', 'engine', 'params', 'history_end'])
+
+    def latest_run(self):
+        row = self.connection.execute('SELECT MAX(run) FROM runs').fetchone()
+        if row[0] is None:
+            raise LookupError(f"No runs stored in {self.path}")
+        return row[0]
+
+    def year(self, year, run=None):
+        """Every course's forecast for one year of a run (the latest by default)"""
+        run = self.latest_run() if run is None else run
+        return self._query(
+            'SELECT f.run, c.course, f.year, f.yhat, f.yhat_lower, f.yhat_upper '
+            'FROM forecasts f INDEXED BY forecasts_run_year JOIN courses c USING (course_id) '
+            'WHERE f.run = ? AND f.year = ? ORDER BY c.course', (run, int(year)))
+
+    def course(self, course, last_runs=5, years=None):
+        """One course across the last_runs most recent runs, optionally for a (first, last) year range"""
+        sql = ('SELECT f.run, c.course, f.year, f.yhat, f.yhat_lower, f.yhat_upper '
+               'FROM courses c JOIN forecasts f USING (course_id) '
+               'WHERE c.course = ? AND f.run IN (SELECT run FROM runs ORDER BY run DESC LIMIT ?)')
+        parameters = [course, int(last_runs)]
+        if years is not None:
+            sql += ' AND f.year BETWEEN ? AND ?'
+            parameters += [int(years[0]), int(years[1])]
+        return self._query(sql + ' ORDER BY f.run DESC, f.year', parameters)
+
+    def compare(self, run, other=None):
+        """Forecast differences per course and year between run and other (the previous run by default)"""
+        if other is None:
+            row = self.connection.execute('SELECT MAX(run) FROM runs WHERE run < ?', (run,)).fetchone()
+            if row[0] is None:
+                raise LookupError(f"No run before {run}")
+            other = row[0]
+        rows = self.connection.execute(
+            'SELECT c.course, a.year, b.yhat, a.yhat FROM forecasts a '
+            'JOIN forecasts b ON b.run = ? AND b.course_id = a.course_id AND b.year = a.year '
+            'JOIN courses c ON c.course_id = a.course_id WHERE a.run = ? ORDER BY c.course, a.year',
+            (other, run)).fetchall()
+        diff = pd.DataFrame(rows, columns=['course', 'year', 'previous', 'current'])
+        diff['delta'] = diff['current'] - diff['previous']
+        return diff
+
+    def _run_courses(self, run):
+        return [course for course, in self.connection.execute(
+            'SELECT c.course FROM run_courses r JOIN courses c USING (course_id) WHERE r.run = ? ORDER BY r.position',
+            (run,))]
+
+    def _run_block(self, run, after_year=None):
+        """(courses, (5, rows) float64 array of year, yhat, yhat_lower, yhat_upper, course position)"""
+        sql = ('SELECT f.year, f.yhat, f.yhat_lower, f.yhat_upper, r.position FROM run_courses r '
+               'JOIN forecasts f ON f.course_id = r.course_id AND f.run = r.run WHERE r.run = ?')
+        parameters = [run]
+        if after_year is not None:
+            sql += ' AND f.year > ?'
+            parameters.append(int(after_year))
+        rows = self.connection.execute(sql + ' ORDER BY r.position, f.year', parameters).fetchall()
+        return self._run_courses(run), np.array(rows, dtype=np.float64).reshape(-1, len(RESULT_COLUMNS) + 1).T
+
+    def load(self, run=None):
+        """A whole run as a ForecastResults, in the course order it was recorded in"""
+        courses, values = self._run_block(self.latest_run() if run is None else run)
+        offsets = np.zeros(len(courses) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(values[-1].astype(np.int64), minlength=len(courses)), out=offsets[1:])
+        return ForecastResults(courses, values[:-1].astype(np.float32), offsets)
+
+    def summary(self, run=None, after_year=None):
+        """create_forecast_summary's {course: arrays} for the years after after_year, read in one query"""
+        if after_year is None:
+            after_year = datetime.now().year
+        courses, values = self._run_block(self.latest_run() if run is None else run, after_year)
+        positions = values[-1].astype(np.int64)
+        bounds = np.searchsorted(positions, np.arange(len(courses) + 1))
+        summary = {}
+        for i, course in enumerate(courses):
+            if bounds[i] == bounds[i + 1]:
+                continue
+            rows = values[:, bounds[i]:bounds[i + 1]]
+            summary[course] = {
+                'Years': rows[0].astype(np.int32),
+                'Predicted_Values': rows[1],
+                'Lower_Bound': rows[2],
+                'Upper_Bound': rows[3],
+            }
+        return summary
+
+    def prune(self, keep=10):
+        """Delete all but the keep most recent runs; returns how many were removed"""
+        with self.connection:
+            removed = self.connection.execute(
+                'DELETE FROM runs WHERE run NOT IN (SELECT run FROM runs ORDER BY run DESC LIMIT ?)',
+                (int(keep),)).rowcount
+        return removed
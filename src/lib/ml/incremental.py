@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .forecast import build_enrollment_records, get_supabase_client, save_records_in_batches
+from .model import forecast_all_courses
+
+
+def build_manifest(df):
+    """Fingerprint every course's history: a hash, the last year seen and its rows"""
+    manifest = {}
+    for course, rows in df.sort_values('Original_Year', kind='stable').groupby('Course Code', sort=False, observed=True):
+        years = rows['Original_Year'].to_numpy(dtype=np.int64)
+        enrollment = rows['Enrollment'].to_numpy(dtype=np.float64)
+        digest = hashlib.sha256(years.tobytes() + enrollment.tobytes()).hexdigest()
+        manifest[str(course)] = {
+            'hash': digest,
+            'last_year': int(years.max()),
+            'rows': {str(year): value for year, value in zip(years.tolist(), enrollment.tolist())},
+        }
+    return manifest
+
+
+def load_manifest(path):
+    """Return the manifest saved by the last run, or an empty one"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def plan_incremental_run(df, previous):
+    """Work out which courses need refitting compared with the previous manifest"""
+    current = build_manifest(df)
+
+    added = [course for course in current if course not in previous]
+    removed = [course for course in previous if course not in current]
+    changed = [course for course in current
+               if course in previous and current[course]['hash'] != previous[course]['hash']]
+    unchanged = [course for course in current
+                 if course in previous and current[course]['hash'] == previous[course]['hash']]
+
+    refit = added + changed
+    # The total depends on every course, so any change means refitting it too
+    if refit and 'GRAND_TOTAL' in current and 'GRAND_TOTAL' not in refit:
+        refit.insert(0, 'GRAND_TOTAL')
+
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': unchanged,
+        'refit': refit,
+        'manifest': current,
+    }
+
+
+def changed_records(records, refit, previous):
+    """Keep forecast rows of refitted courses and only the actual rows that differ"""
+    records = records[records['courseCode'].isin(refit)]
+    seen = pd.DataFrame(
+        [(course, int(year), value)
+         for course, entry in previous.items()
+         for year, value in entry['rows'].items()],
+        columns=['courseCode', 'year', 'previous']
+    )
+    merged = records.merge(seen, on=['courseCode', 'year'], how='left')
+    unchanged_actual = merged['isActual'] & (merged['previous'] == merged['enrollment'])
+    return records[~unchanged_actual.to_numpy()]
+
+
+def failed_courses(forecasts, df, refit):
+    """Refitted courses that should have a forecast but whose fit raised"""
+    forecast = {str(course) for course in forecasts}
+    sizes = df['Course Code'].astype(str).value_counts()
+    # Courses with fewer than 3 years are never forecast, so they are not failures
+    return [course for course in refit
+            if course not in forecast and (course == 'GRAND_TOTAL' or sizes.get(course, 0) >= 3)]
+
+
+def print_plan(plan):
+    print(f"Courses to refit ({len(plan['refit'])}): {', '.join(plan['refit']) or 'none'}")
+    print(f"  new: {len(plan['added'])}, changed: {len(plan['changed'])}, "
+          f"unchanged: {len(plan['unchanged'])}, no longer in input: {len(plan['removed'])}")
+
+
+def run_incremental(df, manifest_path, dry_run=False, supabase=None, batch_size=500, **forecast_options):
+    """Refit and save only the courses whose history changed since the last run.
+
+    The manifest is only replaced once every batch saved successfully, so
+    a failed run is retried in full next time. Courses whose fit failed
+    keep their previous entry (or none), so they are refitted next time.
+    """
+    previous = load_manifest(manifest_path)
+    plan = plan_incremental_run(df, previous)
+    print_plan(plan)
+
+    if dry_run or not plan['refit']:
+        return plan
+
+    forecasts = forecast_all_courses(df[df['Course Code'].isin(plan['refit'])], **forecast_options)
+    records = changed_records(build_enrollment_records(forecasts, df), plan['refit'], previous)
+
+    if supabase is None:
+        supabase = get_supabase_client()
+    report = save_records_in_batches(supabase, records, batch_size=batch_size)
+    plan['report'] = report
+    plan['failed'] = failed_courses(forecasts, df, plan['refit'])
+
+    if report['failed_batches']:
+        print(f"{report['failed_rows']} rows failed to save; keeping the previous manifest")
+    else:
+        manifest = dict(plan['manifest'])
+        for course in plan['failed']:
+            if course in previous:
+                manifest[course] = previous[course]
+            else:
+                manifest.pop(course, None)
+        if plan['failed']:
+            print(f"Forecasting failed for {', '.join(plan['failed'])}; they will be refitted next run")
+        save_manifest(manifest_path, manifest)
+        print(f"Saved {report['rows']} changed rows for {len(plan['refit'])} courses")
+
+    return plan
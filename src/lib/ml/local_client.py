@@ -0,0 +1,174 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+
+
+class LocalSupabaseClient:
+    """In-memory stand-in for the parts of the Supabase client forecast.py uses.
+
+    Rows live in self.tables keyed by table name. Every execute() counts as
+    one request, and requests whose number is in fail_requests raise, so
+    batching and per-batch error handling can be exercised offline.
+    """
+
+    def __init__(self, fail_requests=()):
+        self.tables = {}
+        self.indexes = {}
+        self.requests = 0
+        self.fail_requests = set(fail_requests)
+
+    def table(self, name):
+        return _LocalQuery(self, name)
+
+
+class _LocalQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.rows = client.tables.setdefault(name, [])
+        self.action = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.bounds = None
+
+    def insert(self, data):
+        self.action = 'insert'
+        self.payload = data if isinstance(data, list) else [data]
+        return self
+
+    def upsert(self, data, on_conflict=''):
+        self.action = 'upsert'
+        self.payload = data if isinstance(data, list) else [data]
+        self.on_conflict = [column for column in on_conflict.split(',') if column]
+        return self
+
+    def update(self, data):
+        self.action = 'update'
+        self.payload = data
+        return self
+
+    def select(self, *columns):
+        self.action = 'select'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def _matches(self, row):
+        return all(row.get(column) == value for column, value in self.filters)
+
+    def _conflict_index(self):
+        """Row positions by conflict key, kept on the client between requests"""
+        index_key = (self.name, tuple(self.on_conflict))
+        index = self.client.indexes.get(index_key)
+        if index is None:
+            index = {
+                tuple(row.get(column) for column in self.on_conflict): i
+                for i, row in enumerate(self.rows)
+            }
+            self.client.indexes[index_key] = index
+        return index
+
+    def execute(self):
+        self.client.requests += 1
+        if self.client.requests in self.client.fail_requests:
+            raise Exception(f"Simulated failure for request {self.client.requests}")
+
+        if self.action in ('insert', 'update'):
+            # Only upserts keep the conflict indexes current
+            self.client.indexes.clear()
+
+        if self.action == 'insert':
+            self.rows.extend(dict(row) for row in self.payload)
+            return SimpleNamespace(data=list(self.payload))
+
+        if self.action == 'upsert':
+            index = self._conflict_index()
+            for row in self.payload:
+                key = tuple(row.get(column) for column in self.on_conflict)
+                if self.on_conflict and key in index:
+                    self.rows[index[key]].update(row)
+                else:
+                    index[key] = len(self.rows)
+                    self.rows.append(dict(row))
+            return SimpleNamespace(data=list(self.payload))
+
+        if self.action == 'update':
+            updated = []
+            for row in self.rows:
+                if self._matches(row):
+                    row.update(self.payload)
+                    updated.append(row)
+            return SimpleNamespace(data=updated)
+
+        rows = [row for row in self.rows if self._matches(row)]
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return SimpleNamespace(data=rows)
+
+
+class LocalPostgrestTransport(httpx.AsyncBaseTransport):
+    """PostgREST-compatible HTTP stub over a LocalSupabaseClient, for httpx.AsyncClient(transport=...).
+
+    Serves POST /<table> inserts and upserts (on_conflict with
+    Prefer: resolution=merge-duplicates) and GET /<table> reads with eq.
+    filters. latency delays every response, fail_requests maps request
+    numbers to the HTTP status returned instead (a plain set means 503),
+    and drop_responses applies the write but then times out, like a
+    response lost on the way back.
+    """
+
+    def __init__(self, client=None, latency=0.0, fail_requests=(), drop_responses=()):
+        self.client = client if client is not None else LocalSupabaseClient()
+        self.latency = latency
+        self.fail_requests = (dict(fail_requests) if isinstance(fail_requests, dict)
+                              else {number: 503 for number in fail_requests})
+        self.drop_responses = set(drop_responses)
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        number = self.requests
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if number in self.fail_requests:
+            status = self.fail_requests[number]
+            return httpx.Response(status, json={'message': f"Simulated failure for request {number}"})
+
+        table = request.url.path.rstrip('/').rsplit('/', 1)[-1]
+        params = request.url.params
+        query = self.client.table(table)
+        if request.method == 'POST':
+            rows = json.loads(request.content)
+            merge = 'resolution=merge-duplicates' in request.headers.get('Prefer', '')
+            query = query.upsert(rows, on_conflict=params.get('on_conflict', '')) if merge else query.insert(rows)
+        elif request.method == 'GET':
+            query = query.select()
+            for column, value in params.multi_items():
+                if value.startswith('eq.'):
+                    query = query.eq(column, _parse_value(value[3:]))
+        else:
+            return httpx.Response(405)
+        result = query.execute()
+
+        if number in self.drop_responses:
+            raise httpx.ReadTimeout(f"Simulated lost response for request {number}", request=request)
+        if request.method == 'POST' and 'return=minimal' in request.headers.get('Prefer', ''):
+            return httpx.Response(201)
+        return httpx.Response(200 if request.method == 'GET' else 201, json=result.data)
+
+
+def _parse_value(text):
+    """Filter values arrive as text; compare them the way PostgREST casts them"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
@@ -1,54 +1,197 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from prophet import Prophet
-import matplotlib.pyplot as plt
+from pandas.api.types import union_categoricals
+
+from . import profiling
 from datetime import datetime
-import seaborn as sns
 
 
-def load_and_prepare_data(excel_path):
-    df = pd.read_csv(excel_path)
-    # Strip whitespace from Course Code
-    df['Course Code'] = df['Course Code'].str.strip()
+# Compact column types for the streaming loader
+ENROLLMENT_DTYPES = {'Year': 'int16', 'Course Code': 'category', 'Enrollment': 'int32'}
+
+
+def _strip_categories(codes):
+    """Strip whitespace from categorical labels, merging labels that become equal"""
+    stripped = codes.categories.str.strip()
+    categories = pd.Index(pd.unique(stripped))
+    remap = np.append(categories.get_indexer(stripped), -1)
+    # Code -1 (missing) indexes the trailing -1 and stays missing
+    return pd.Categorical.from_codes(remap[codes.codes], categories=categories)
+
+
+def years_to_datetime(years):
+    """Jan 1 of each year, computed arithmetically instead of parsing strings"""
+    years = np.asarray(years, dtype=np.int64) - 1970
+    return pd.to_datetime(years.astype('datetime64[Y]').astype('datetime64[ns]'))
+
+
+def read_enrollment_chunks(excel_path, chunksize=100_000):
+    """Yield typed enrollment chunks with stripped, categorical course codes"""
+    for chunk in pd.read_csv(excel_path, dtype=ENROLLMENT_DTYPES, chunksize=chunksize):
+        chunk['Course Code'] = _strip_categories(chunk['Course Code'].array)
+        yield chunk
+
+
+def _prepare_typed(df):
+    """Apply ENROLLMENT_DTYPES and the derived year columns to a raw frame"""
+    df = df.astype(ENROLLMENT_DTYPES)
+    df['Course Code'] = _strip_categories(df['Course Code'].array)
     df['Original_Year'] = df['Year']
-    df['Year'] = pd.to_datetime(df['Year'].astype(str) + '-01-01')
+    df['Year'] = years_to_datetime(df['Year'])
     return df
 
 
-def create_prophet_forecast(data, course_code, forecast_years=7):
-    """Improved forecasting with more conservative growth predictions"""
-    prophet_df = data.rename(columns={'Year': 'ds', 'Enrollment': 'y'})
-    
-    # Calculate recent trend (last 3 years)
-    recent_growth = prophet_df['y'].tail(3).pct_change().mean()
-    
-    # Calculate overall trend
-    overall_growth = prophet_df['y'].pct_change().mean()
+def _read_prepared(excel_path, chunksize=None):
+    if str(excel_path).endswith(('.parquet', '.arrow', '.feather')):
+        from .columnar import read_enrollment_table
+        return _prepare_typed(read_enrollment_table(excel_path))
+    
+    if chunksize is None:
+        df = pd.read_csv(excel_path)
+        # Strip whitespace from Course Code
+        df['Course Code'] = df['Course Code'].str.strip()
+        df['Original_Year'] = df['Year']
+        df['Year'] = pd.to_datetime(df['Year'].astype(str) + '-01-01')
+        return df
+    
+    chunks = list(read_enrollment_chunks(excel_path, chunksize))
+    if not chunks:
+        chunks = [pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in ENROLLMENT_DTYPES.items()})]
+    
+    # Chunks see different course codes, so combine the categories explicitly
+    course_codes = union_categoricals([chunk['Course Code'].array for chunk in chunks])
+    df = pd.concat([chunk.drop(columns='Course Code') for chunk in chunks], ignore_index=True)
+    df.insert(1, 'Course Code', course_codes)
+    df['Original_Year'] = df['Year']
+    df['Year'] = years_to_datetime(df['Year'])
+    return df
+
+
+@profiling.profiled('load_and_prepare_data', rows=len)
+def load_and_prepare_data(excel_path, chunksize=None, validate=True):
+    """Load the enrollment CSV, or a Parquet/Arrow file with the same columns.
+
+    With chunksize set the CSV is streamed in chunks of that many rows
+    using ENROLLMENT_DTYPES, so large per-term or per-section exports stay
+    compact in memory. Parquet and Arrow files are memory-mapped.
+    
+    validate runs validation.validate_enrollment over the whole frame:
+    bad values and duplicate rows are dropped and series unfit to
+    forecast are excluded before any model is fitted, with a summary of
+    what was found printed.
+    """
+    df = _read_prepared(excel_path, chunksize)
+    if not validate:
+        return df
+    
+    from .validation import print_validation_summary, validate_enrollment
+    with profiling.stage('validate', rows=len(df)):
+        df, report = validate_enrollment(df)
+    print_validation_summary(report)
+    return df
+
+
+def iter_course_groups(df):
+    """Lazily yield (course, rows) pairs without materialising every group up front"""
+    groups = df.groupby('Course Code', sort=False, observed=True).indices
+    for course, positions in groups.items():
+        yield course, df.take(positions)
+
+
+# Forecasts run up to (but not including) this year
+FORECAST_END_YEAR = 2029
+
+# Prophet settings shared by every course fit
+PROPHET_PARAMS = {
+    'growth': 'logistic',
+    'changepoint_prior_scale': 0.0005,  # Reduced for smoother predictions
+    'seasonality_prior_scale': 0.001,
+    'changepoint_range': 0.95,
+    'interval_width': 0.85,  # Wider confidence intervals
+    'yearly_seasonality': False,
+    'weekly_seasonality': False,
+    'daily_seasonality': False,
+}
+
+
+# Hand-tuned growth and bound settings of the conservative post-processing.
+# Cap and floor entries are (x historical max or min, x current value) pairs.
+GROWTH_PARAMS = {
+    'recent_weight': 0.7,
+    'overall_weight': 0.3,
+    'dampening': 0.5,
+    'total_cap': (1.15, 1.2),
+    'total_floor': (0.95, 0.8),
+    'growing_cap': (1.25, 1.3),
+    'growing_floor': (0.9, 0.75),
+    'declining_cap': (1.1, 1.15),
+    'declining_floor': (0.95, 0.85),
+}
+
+
+def growth_params(overrides=None):
+    """GROWTH_PARAMS with overrides applied; unknown names raise ValueError"""
+    overrides = dict(overrides or {})
+    unknown = set(overrides) - set(GROWTH_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown growth parameters: {', '.join(sorted(unknown))}")
+    return {**GROWTH_PARAMS, **overrides}
+
+
+def growth_statistics(y):
+    """The parameter-free inputs of calculate_growth_and_bounds for one series"""
+    return {
+        # Calculate recent trend (last 3 years)
+        'recent_growth': y.tail(3).pct_change().mean(),
+        # Calculate overall trend
+        'overall_growth': y.pct_change().mean(),
+        'historical_max': y.max(),
+        'historical_min': y.min(),
+        'current_value': y.iloc[-1],
+    }
+
+
+def growth_and_bounds_from_statistics(stats, course_code, params=None):
+    """calculate_growth_and_bounds from precomputed growth_statistics"""
+    params = growth_params(params)
     
     # Use a weighted average of recent and overall growth to avoid extreme predictions
-    weighted_growth = (recent_growth * 0.7 + overall_growth * 0.3)
+    weighted_growth = (stats['recent_growth'] * params['recent_weight']
+                       + stats['overall_growth'] * params['overall_weight'])
     
     # Dampen the growth rate for more conservative predictions
-    dampening_factor = 0.5
-    weighted_growth = weighted_growth * dampening_factor
-    
-    # Set course-specific bounds
-    historical_max = prophet_df['y'].max()
-    historical_min = prophet_df['y'].min()
-    current_value = prophet_df['y'].iloc[-1]
+    weighted_growth = weighted_growth * params['dampening']
     
     if course_code == 'GRAND_TOTAL':
         # More conservative bounds for total enrollment
-        cap = min(historical_max * 1.15, current_value * 1.2)
-        floor = max(historical_min * 0.95, current_value * 0.8)
+        kind = 'total'
     else:
         # Individual course bounds - more conservative
-        if weighted_growth > 0:
-            cap = min(historical_max * 1.25, current_value * 1.3)
-            floor = max(historical_min * 0.9, current_value * 0.75)
-        else:
-            cap = min(historical_max * 1.1, current_value * 1.15)
-            floor = max(historical_min * 0.95, current_value * 0.85)
+        kind = 'growing' if weighted_growth > 0 else 'declining'
+    cap_max, cap_current = params[f'{kind}_cap']
+    floor_min, floor_current = params[f'{kind}_floor']
+    cap = min(stats['historical_max'] * cap_max, stats['current_value'] * cap_current)
+    floor = max(stats['historical_min'] * floor_min, stats['current_value'] * floor_current)
+    
+    return weighted_growth, cap, floor
+
+
+def calculate_growth_and_bounds(y, course_code, params=None):
+    """Return the dampened weighted growth rate and the cap/floor for a series.
+    
+    params overrides entries of GROWTH_PARAMS.
+    """
+    return growth_and_bounds_from_statistics(growth_statistics(y), course_code, params)
+
+
+def build_prophet_model(data, course_code, params=None):
+    """Unfitted Prophet model for one course with its training frame, growth and bounds"""
+    prophet_df = data.rename(columns={'Year': 'ds', 'Enrollment': 'y'})
+    
+    weighted_growth, cap, floor = calculate_growth_and_bounds(prophet_df['y'], course_code, params)
     
     prophet_df['cap'] = cap
     prophet_df['floor'] = floor
@@ -60,30 +203,59 @@ def create_prophet_forecast(data, course_code, forecast_years=7):
         freq='YS'
     )
     
-    model = Prophet(
-        growth='logistic',
-        changepoint_prior_scale=0.0005,  # Reduced for smoother predictions
-        seasonality_prior_scale=0.001,
-        changepoint_range=0.95,
-        interval_width=0.85,  # Wider confidence intervals
-        yearly_seasonality=False,
-        weekly_seasonality=False,
-        daily_seasonality=False,
-        changepoints=changepoints
-    )
+    # Imported here so loading data or summarizing never pays for Stan
+    from prophet import Prophet
+    model = Prophet(changepoints=changepoints, **PROPHET_PARAMS)
     
-    model.fit(prophet_df)
+    return model, prophet_df, weighted_growth, cap, floor
+
+
+def fit_prophet_model(data, course_code, init=None, params=None):
+    """Fit the logistic Prophet model for one course.
+
+    init optionally warm-starts Stan from earlier parameters (see
+    model_store.warm_start_params). params overrides GROWTH_PARAMS.
+    Returns the model together with the growth and bounds its forecasts
+    are post-processed with.
+    """
+    model, prophet_df, weighted_growth, cap, floor = build_prophet_model(data, course_code, params)
+    
+    fit_kwargs = {'init': init} if init is not None else {}
+    with profiling.stage('fit', course=course_code, rows=len(prophet_df)):
+        model.fit(prophet_df, **fit_kwargs)
+    
+    return model, weighted_growth, cap, floor
+
+
+def predict_prophet_raw(model, cap, floor, end_year=FORECAST_END_YEAR):
+    """Prophet's own prediction up to end_year, before any post-processing.
     
-    # Calculate exact periods needed to reach 2029
-    last_year = prophet_df['ds'].dt.year.max()
-    periods_needed = 2029 - last_year
+    Returns the forecast frame and the last history year. It depends only
+    on the fit and the bounds, so one prediction can be post-processed
+    with several growth rates.
+    """
+    # Calculate exact periods needed to reach end_year
+    last_year = model.history['ds'].dt.year.max()
+    periods_needed = end_year - last_year
     
     future_dates = model.make_future_dataframe(periods=periods_needed, freq='Y')
     future_dates['cap'] = cap
     future_dates['floor'] = floor
     
-    forecast = model.predict(future_dates)
+    with profiling.stage('predict', rows=len(future_dates)):
+        return model.predict(future_dates), last_year
+
+
+def predict_prophet_forecast(model, weighted_growth, cap, floor, end_year=FORECAST_END_YEAR):
+    """Predict up to end_year from a fitted model and apply the conservative post-processing"""
+    forecast, last_year = predict_prophet_raw(model, cap, floor, end_year)
     
+    with profiling.stage('postprocess', rows=len(forecast)):
+        return postprocess_forecast(forecast, weighted_growth, cap, floor, last_year)
+
+
+def postprocess_forecast(forecast, weighted_growth, cap, floor, last_year):
+    """Clip, extend with log1p growth past last_year and smooth a raw prediction, in place"""
     # Apply more conservative post-processing
     forecast['yhat'] = forecast['yhat'].clip(lower=floor, upper=cap)
     forecast['yhat_lower'] = forecast['yhat_lower'].clip(lower=floor)
@@ -111,29 +283,236 @@ def create_prophet_forecast(data, course_code, forecast_years=7):
     return forecast
 
 
-def forecast_all_courses(df):
+def predict_raw_forecasts(jobs, end_year=FORECAST_END_YEAR, batch=False, cache=None):
+    """Raw predictions (see predict_prophet_raw) for many fits, each fitted once.
+    
+    jobs maps (course, cap, floor) to the (data, params) to fit it with;
+    batch fits them all in one batch_fit.fit_prophet_batch call. With a
+    ForecastCache, predictions are looked up and stored under
+    cache.fit_cache_key. Returns {job: raw forecast}; failed fits are
+    reported and left out.
+    """
+    from .cache import fit_cache_key
+    
+    engine = 'prophet_batch' if batch else 'prophet'
+    raw, keys, pending = {}, {}, []
+    for job, (data, params) in jobs.items():
+        if cache is not None:
+            keys[job] = fit_cache_key(data, job[1], job[2], end_year, engine)
+            forecast = cache.get(keys[job])
+            if forecast is not None:
+                raw[job] = forecast
+                continue
+        pending.append(job)
+    
+    if batch and pending:
+        from .batch_fit import fit_prophet_batch
+        fitted = fit_prophet_batch([(job[0], jobs[job][0]) for job in pending],
+                                   [jobs[job][1] for job in pending])
+    else:
+        fitted = []
+        for course, cap, floor in pending:
+            data, params = jobs[(course, cap, floor)]
+            try:
+                model, _, cap, floor = fit_prophet_model(data, course, params=params)
+                fitted.append((course, model, None, cap, floor, None))
+            except Exception as e:
+                fitted.append((course, None, None, None, None, e))
+    
+    for job, (course, model, _, cap, floor, error) in zip(pending, fitted):
+        if error is None:
+            try:
+                raw[job], _ = predict_prophet_raw(model, cap, floor, end_year)
+            except Exception as e:
+                error = e
+        if error is not None:
+            print(f"Error fitting course {course}: {str(error)}")
+            continue
+        if cache is not None:
+            cache.put(keys[job], raw[job])
+    return raw
+
+
+def create_prophet_forecast(data, course_code, forecast_years=7):
+    """Improved forecasting with more conservative growth predictions"""
+    with profiling.stage('create_prophet_forecast', course=course_code, rows=len(data)):
+        model, weighted_growth, cap, floor = fit_prophet_model(data, course_code)
+        return predict_prophet_forecast(model, weighted_growth, cap, floor)
+
+
+def _forecast_course(task):
+    """Forecast one course inside a worker, returning the error instead of raising"""
+    course, course_data = task
+    try:
+        return course, create_prophet_forecast(course_data, course), None
+    except Exception as e:
+        return course, None, e
+
+
+def _profiled_forecast_course(task):
+    """_forecast_course in a worker process, also returning the stages it recorded"""
+    return _forecast_course(task) + (profiling.drain(),)
+
+
+def _cached_forecast(data, course_code, cache):
+    """Serve a course forecast from the cache, fitting and storing it on a miss"""
+    if cache is None:
+        return create_prophet_forecast(data, course_code)
+    key = cache.key(data, course_code)
+    forecast = cache.get(key)
+    if forecast is None:
+        forecast = create_prophet_forecast(data, course_code)
+        cache.put(key, forecast)
+    return forecast
+
+
+def forecast_all_courses(df, workers=1, cache=None, engine='prophet', reconcile=None, levels=None,
+                         diagnostics=False):
+    """Forecast GRAND_TOTAL and every course.
+
+    workers > 1 spreads the per-course fits across that many processes
+    (workers=None uses every core). Results keep the course order of the
+    input regardless of the worker count. When a ForecastCache is given,
+    courses whose history is unchanged are served from it without fitting.
+    engine='vectorized' skips Prophet and forecasts every course at once
+    with NumPy (see vectorized.forecast_all_courses_vectorized).
+    engine='prophet_batch' keeps the Prophet models but fits all of them
+    in one batched optimization instead of one Stan run per course (see
+    batch_fit.fit_prophet_batch); workers is then ignored. Its fits can
+    reach a different optimum than Stan's, so its forecasts differ from
+    engine='prophet' ones.
+    
+    reconcile names a reconcile.reconcile_forecasts method so the courses
+    add up to GRAND_TOTAL (and to any extra levels, e.g. colleges).
+    'bottom_up' derives GRAND_TOTAL from the courses instead of fitting it.
+    
+    Returns a results.ForecastResults holding only year, yhat, yhat_lower
+    and yhat_upper of every course, compacted as each course finishes.
+    diagnostics=True returns {course: full forecast frame} instead, with
+    every trend and component column.
+    """
+    # Reconciliation works on full frames, so those are compacted at the end
+    compact = not diagnostics and reconcile is None
+    if engine == 'vectorized':
+        from .vectorized import forecast_all_courses_vectorized
+        forecasts = forecast_all_courses_vectorized(df, compact=compact)
+    elif engine == 'prophet':
+        forecasts = _forecast_all_courses_prophet(df, workers, cache, fit_total=reconcile != 'bottom_up',
+                                                  compact=compact)
+    elif engine == 'prophet_batch':
+        forecasts = _forecast_all_courses_prophet(df, workers, cache, fit_total=reconcile != 'bottom_up',
+                                                  batch=True, compact=compact)
+    else:
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    
+    if reconcile is not None:
+        from .reconcile import reconcile_forecasts
+        forecasts = reconcile_forecasts(forecasts, reconcile, levels=levels, actual_data=df)
+    
+    if not diagnostics:
+        from .results import ForecastResults
+        forecasts = ForecastResults.from_forecasts(forecasts)
+    return forecasts
+
+
+def _forecast_courses_batched(tasks):
+    """Fit every (course, data) task in one batched optimization, then predict each course"""
+    from .batch_fit import fit_prophet_batch
+    
+    results = []
+    for course, model, weighted_growth, cap, floor, error in fit_prophet_batch(tasks):
+        forecast = None
+        if error is None:
+            try:
+                forecast = predict_prophet_forecast(model, weighted_growth, cap, floor)
+            except Exception as e:
+                error = e
+        results.append((course, forecast, error))
+    return results
+
+
+def _forecast_all_courses_prophet(df, workers, cache, fit_total=True, batch=False, compact=False):
+    from .results import ForecastResults, compact_forecast
+    
     forecasts = {}
+    engine = 'prophet_batch' if batch else 'prophet'
+    # Compact mode keeps only the result block of each course, never every full frame at once
+    keep = compact_forecast if compact else (lambda forecast: forecast)
     
     # First forecast GRAND_TOTAL
     total_data = df[df['Course Code'] == 'GRAND_TOTAL'].copy()
-    if not total_data.empty:
-        forecasts['GRAND_TOTAL'] = create_prophet_forecast(total_data, 'GRAND_TOTAL')
+    fit_total = fit_total and not total_data.empty
+    if fit_total and not batch:
+        forecasts['GRAND_TOTAL'] = keep(_cached_forecast(total_data, 'GRAND_TOTAL', cache))
     
     # Then forecast individual courses
-    courses = df[df['Course Code'] != 'GRAND_TOTAL']['Course Code'].unique()
+    tasks = [
+        (course, course_data)
+        for course, course_data in iter_course_groups(df[df['Course Code'] != 'GRAND_TOTAL'])
+        if len(course_data) >= 3
+    ]
+    # A batched fit takes the total as one more series
+    if fit_total and batch:
+        tasks.insert(0, ('GRAND_TOTAL', total_data))
+    courses = [course for course, _ in tasks]
+    
+    # Only the courses missing from the cache need a fit
+    course_forecasts = {}
+    keys = {}
+    if cache is not None:
+        pending = []
+        for course, course_data in tasks:
+            keys[course] = cache.key(course_data, course, engine)
+            forecast = cache.get(keys[course])
+            if forecast is None:
+                pending.append((course, course_data))
+            else:
+                course_forecasts[course] = keep(forecast)
+        tasks = pending
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    
+    if batch:
+        results = _forecast_courses_batched(tasks) if tasks else []
+    elif workers == 1:
+        results = map(_forecast_course, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=profiling.start_worker,
+                                 initargs=profiling.worker_options()) as executor:
+            results = []
+            for course, forecast, error, records in executor.map(_profiled_forecast_course, tasks):
+                profiling.extend(records)
+                results.append((course, forecast, error))
+    
+    for course, forecast, error in results:
+        if error is not None:
+            if course == 'GRAND_TOTAL':
+                raise error
+            print(f"Error forecasting course {course}: {str(error)}")
+            continue
+        if cache is not None:
+            cache.put(keys[course], forecast)
+        course_forecasts[course] = keep(forecast)
+    
     for course in courses:
-        try:
-            course_data = df[df['Course Code'] == course].copy()
-            if len(course_data) >= 3:
-                forecast = create_prophet_forecast(course_data, course)
-                forecasts[course] = forecast
-        except Exception as e:
-            print(f"Error forecasting course {course}: {str(e)}")
+        if course in course_forecasts:
+            forecasts[course] = course_forecasts[course]
     
+    if compact:
+        return ForecastResults.from_blocks(forecasts.keys(), forecasts.values())
     return forecasts
 
 
-def plot_forecasts(forecasts, actual_data):
+def plot_forecasts(forecasts, actual_data, output_dir=None, formats=('png',), workers=1):
+    # Headless export: render every chart to files instead of showing windows
+    if output_dir is not None:
+        from .render import export_forecast_charts
+        return export_forecast_charts(forecasts, actual_data, output_dir, formats=formats, workers=workers)
+
+    import matplotlib.pyplot as plt
+
     # Set style
     plt.style.available
     
@@ -147,26 +526,35 @@ def plot_forecasts(forecasts, actual_data):
             _plot_single_forecast(course, forecasts[course], actual_data, is_total=False)
 
 def _plot_single_forecast(course, forecast, actual_data, is_total=False):
-    plt.figure(figsize=(12, 6))
-    
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_forecast(ax, course, forecast, actual_data[actual_data['Course Code'] == course], is_total)
+    fig.tight_layout()
+    plt.show()
+
+
+def draw_forecast(ax, course, forecast, actual, is_total=False):
+    """Draw one course's history and forecast onto ax"""
+    from matplotlib.ticker import FuncFormatter
+
     # Plot actual values
-    actual = actual_data[actual_data['Course Code'] == course]
-    plt.plot(actual['Original_Year'], actual['Enrollment'], 
-             'ko-', label='Historical', markersize=8, linewidth=2)
+    ax.plot(actual['Original_Year'], actual['Enrollment'], 
+            'ko-', label='Historical', markersize=8, linewidth=2)
     
     # Plot forecast
     future_mask = forecast['year'] > 2022
     
     # Historical fitted values
-    plt.plot(forecast[~future_mask]['year'], forecast[~future_mask]['yhat'],
-             'b--', label='Fitted', alpha=0.6, linewidth=2)
+    ax.plot(forecast[~future_mask]['year'], forecast[~future_mask]['yhat'],
+            'b--', label='Fitted', alpha=0.6, linewidth=2)
     
     # Future predictions
-    plt.plot(forecast[future_mask]['year'], forecast[future_mask]['yhat'],
-             'b-', label='Forecast', linewidth=2)
+    ax.plot(forecast[future_mask]['year'], forecast[future_mask]['yhat'],
+            'b-', label='Forecast', linewidth=2)
     
     # Confidence intervals for future predictions only
-    plt.fill_between(
+    ax.fill_between(
         forecast[future_mask]['year'],
         forecast[future_mask]['yhat_lower'],
         forecast[future_mask]['yhat_upper'],
@@ -176,7 +564,7 @@ def _plot_single_forecast(course, forecast, actual_data, is_total=False):
     
     # Annotate future points
     for year, value in zip(forecast[future_mask]['year'], forecast[future_mask]['yhat']):
-        plt.annotate(
+        ax.annotate(
             f'{int(round(value))}',
             (year, value),
             xytext=(0, 10),
@@ -187,27 +575,41 @@ def _plot_single_forecast(course, forecast, actual_data, is_total=False):
         )
     
     title = 'Total Enrollment Forecast' if is_total else f'Enrollment Forecast for {course}'
-    plt.title(title, pad=20, fontsize=14, fontweight='bold')
-    plt.xlabel('Year', fontsize=12)
-    plt.ylabel('Enrollment', fontsize=12)
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
+    ax.set_title(title, pad=20, fontsize=14, fontweight='bold')
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('Enrollment', fontsize=12)
+    ax.legend(fontsize=10)
+    ax.grid(True, alpha=0.3)
     
     # Improve x-axis
-    plt.gca().xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'{int(x)}'))
-    plt.xticks(rotation=45)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{int(x)}'))
+    ax.tick_params(axis='x', labelrotation=45)
     
     # Set y-axis to start from 0
     ymax = max(actual['Enrollment'].max() * 1.2, forecast[future_mask]['yhat_upper'].max() * 1.1)
-    plt.ylim(bottom=0, top=ymax)
-    
-    plt.tight_layout()
-    plt.show()
+    ax.set_ylim(bottom=0, top=ymax)
 
 
+@profiling.profiled('create_forecast_summary', rows=len)
 def create_forecast_summary(forecasts):
+    from .results import ForecastResults
+    
     summary = {}
     
+    if isinstance(forecasts, ForecastResults):
+        # Slice the result block directly instead of building a frame per course
+        current_year = datetime.now().year
+        for course in forecasts:
+            year, yhat, lower, upper = forecasts.arrays(course)
+            future = year > current_year
+            summary[course] = {
+                'Years': year[future],
+                'Predicted_Values': yhat[future],
+                'Lower_Bound': lower[future],
+                'Upper_Bound': upper[future]
+            }
+        return summary
+    
     for course, forecast in forecasts.items():
         # Get the future predictions (excluding historical dates)
         current_year = datetime.now().year
@@ -223,13 +625,7 @@ def create_forecast_summary(forecasts):
     return summary
 
 
-def main():
-    excel_path = r'C:\Users\acer\Desktop\plp-enrollment-insights-dashboardd\src\lib\ml\data\EnrollmentData.csv'
-    df = load_and_prepare_data(excel_path)
-    forecasts = forecast_all_courses(df)
-
-    # Create and print a more readable summary
-    summary = create_forecast_summary(forecasts)
+def print_forecast_summary(summary):
     for course, details in summary.items():
         print(f"\nForecast Summary for {course}:")
         print("  Year   | Predicted Value | Lower Bound | Upper Bound")
@@ -237,7 +633,16 @@ def main():
         for year, predicted, lower, upper in zip(details['Years'], details['Predicted_Values'], details['Lower_Bound'], details['Upper_Bound']):
             print(f"  {year}  | {predicted:.2f}        | {lower:.2f}     | {upper:.2f}")
 
-    plot_forecasts(forecasts, df)
+
+def main():
+    excel_path = r'C:\Users\acer\Desktop\plp-enrollment-insights-dashboardd\src\lib\ml\data\EnrollmentData.csv'
+    df = load_and_prepare_data(excel_path)
+    forecasts = forecast_all_courses(df)
+
+    # Create and print a more readable summary
+    print_forecast_summary(create_forecast_summary(forecasts))
+
+    plot_forecasts(forecasts, df, output_dir=os.getenv("FORECAST_CHART_DIR"))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+from importlib.metadata import version
+
+import numpy as np
+import pandas as pd
+from prophet.serialize import model_from_json, model_to_json
+
+from .model import (
+    FORECAST_END_YEAR,
+    GROWTH_PARAMS,
+    PROPHET_PARAMS,
+    fit_prophet_model,
+    iter_course_groups,
+    predict_prophet_forecast,
+)
+
+
+def history_hash(data):
+    """Hash of a course's (ds, y) history and fit settings, to tell whether a stored fit is still current.
+
+    PROPHET_PARAMS, GROWTH_PARAMS (its caps and floors feed the logistic
+    fit) and the prophet version are hashed too, as in cache.fit_cache_key,
+    so changing any of them refits instead of reusing a stale model.
+    """
+    ds = pd.to_datetime(data['Year']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    y = data['Enrollment'].to_numpy(dtype=np.float64)
+    settings = json.dumps({
+        'prophet': PROPHET_PARAMS,
+        'growth': GROWTH_PARAMS,
+        'prophet_version': version('prophet'),
+    }, sort_keys=True)
+    return hashlib.sha256(ds.tobytes() + y.tobytes() + settings.encode('utf-8')).hexdigest()
+
+
+def warm_start_params(model, n_changepoints=None):
+    """Fitted Stan parameters of model in the form Prophet.fit(init=...) expects.
+
+    delta has one entry per changepoint; when the new fit has a different
+    number of changepoints (a year was added) it is padded with zeros or
+    trimmed so the rest of the fit still warm-starts.
+    """
+    params = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    params['beta'] = np.asarray(model.params['beta'][0])
+    delta = np.asarray(model.params['delta'][0])
+    if n_changepoints is not None and len(delta) != n_changepoints:
+        resized = np.zeros(n_changepoints)
+        kept = min(len(delta), n_changepoints)
+        resized[:kept] = delta[:kept]
+        delta = resized
+    params['delta'] = delta
+    return params
+
+
+class ModelStore:
+    """Fitted Prophet models per course, serialized to a directory between runs.
+
+    Each course has a <course>.json holding the Prophet model and a
+    <course>.meta.json with the growth, cap/floor and history hash needed
+    to forecast again without refitting.
+    """
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        os.makedirs(model_dir, exist_ok=True)
+
+    def _paths(self, course):
+        base = os.path.join(self.model_dir, course)
+        return f"{base}.json", f"{base}.meta.json"
+
+    def save(self, course, model, meta):
+        model_path, meta_path = self._paths(course)
+        with open(model_path, 'w') as f:
+            f.write(model_to_json(model))
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+
+    def load(self, course):
+        """Return (model, meta) for a course, or (None, None) when nothing is stored"""
+        model_path, meta_path = self._paths(course)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(model_path) as f:
+            model = model_from_json(f.read())
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return model, meta
+
+    def forecast(self, course, end_year=FORECAST_END_YEAR):
+        """Forecast a stored course to a new horizon without refitting"""
+        model, meta = self.load(course)
+        if model is None:
+            raise KeyError(f"No stored model for course {course}")
+        return predict_prophet_forecast(model, meta['weighted_growth'], meta['cap'], meta['floor'], end_year)
+
+
+def forecast_course_warm(store, data, course_code, end_year=FORECAST_END_YEAR):
+    """Forecast one course, reusing or warm-starting from the stored model.
+
+    If the history is unchanged the stored model only predicts. Otherwise the
+    model is refitted, warm-started from the stored parameters when there
+    are any, and saved for the next run. The logistic fit is not convex, so
+    a warm start can settle on a nearby optimum rather than the one a cold
+    fit finds. Returns (forecast, how) where how is 'stored', 'warm' or
+    'cold'.
+    """
+    digest = history_hash(data)
+    stored, meta = store.load(course_code)
+
+    if stored is not None and meta.get('history_hash') == digest:
+        forecast = predict_prophet_forecast(stored, meta['weighted_growth'], meta['cap'], meta['floor'], end_year)
+        return forecast, 'stored'
+
+    init = None
+    if stored is not None:
+        n_changepoints = len(pd.date_range(data['Year'].min(), data['Year'].max(), freq='YS'))
+        init = warm_start_params(stored, n_changepoints)
+
+    model, weighted_growth, cap, floor = fit_prophet_model(data, course_code, init=init)
+    store.save(course_code, model, {
+        'weighted_growth': float(weighted_growth),
+        'cap': float(cap),
+        'floor': float(floor),
+        'history_hash': digest,
+    })
+    forecast = predict_prophet_forecast(model, weighted_growth, cap, floor, end_year)
+    return forecast, 'warm' if init is not None else 'cold'
+
+
+def forecast_all_courses_warm(df, store, end_year=FORECAST_END_YEAR):
+    """forecast_all_courses backed by a ModelStore.
+
+    Prints how many courses were served from stored models, warm-started
+    or fitted from scratch. Changing end_year (say to 2035) needs no refit
+    for courses whose history is unchanged.
+    """
+    forecasts = {}
+    counts = {'stored': 0, 'warm': 0, 'cold': 0}
+
+    total_data = df[df['Course Code'] == 'GRAND_TOTAL']
+    groups = [('GRAND_TOTAL', total_data)] if not total_data.empty else []
+    groups += [
+        (course, course_data)
+        for course, course_data in iter_course_groups(df[df['Course Code'] != 'GRAND_TOTAL'])
+        if len(course_data) >= 3
+    ]
+
+    for course, course_data in groups:
+        try:
+            forecasts[course], how = forecast_course_warm(store, course_data, course, end_year)
+            counts[how] += 1
+        except Exception as e:
+            if course == 'GRAND_TOTAL':
+                raise
+            print(f"Error forecasting course {course}: {str(e)}")
+
+    print(f"Models reused: {counts['stored']}, warm-started: {counts['warm']}, fitted cold: {counts['cold']}")
+    return forecasts
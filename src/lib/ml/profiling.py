@@ -0,0 +1,220 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module; max_rss_mb is recorded as None there
+    resource = None
+
+# The active Profiler, or None when profiling is off (the default)
+_profiler = None
+
+
+class Profiler:
+    """Collects one record per pipeline stage: wall and CPU time, memory and rows.
+
+    Records are appended to jsonl_path as they finish, one JSON object per
+    line. trace_memory adds each stage's peak Python allocation through
+    tracemalloc, and cprofile_path dumps a cProfile of the whole run for
+    pstats or snakeviz; both slow the run down noticeably.
+    """
+
+    def __init__(self, jsonl_path=None, trace_memory=False, cprofile_path=None):
+        self.jsonl_path = jsonl_path
+        self.trace_memory = trace_memory
+        self.cprofile_path = cprofile_path
+        self.records = []
+        self._peaks = []
+        self._cprofile = None
+        self._jsonl = None
+
+    def start(self):
+        if self.jsonl_path:
+            self._jsonl = open(self.jsonl_path, 'a')
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+    def add(self, record):
+        self.records.append(record)
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record, default=str) + '\n')
+            self._jsonl.flush()
+
+    def _enter_peak(self):
+        # tracemalloc has one peak counter; fold it into the enclosing stage before resetting
+        if not self.trace_memory:
+            return
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+
+    def _exit_peak(self):
+        if not self.trace_memory:
+            return None
+        peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        return peak
+
+    def summary(self):
+        """Totals per stage name, in the order the stages first ran"""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {
+                'stage': record['stage'], 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                'rows': 0, 'max_rss_mb': None, 'peak_traced_mb': None,
+            })
+            total['calls'] += 1
+            total['wall_s'] += record['wall_s']
+            total['cpu_s'] += record['cpu_s']
+            total['rows'] += record.get('rows') or 0
+            if record.get('max_rss_mb') is not None:
+                total['max_rss_mb'] = max(total['max_rss_mb'] or 0.0, record['max_rss_mb'])
+            if record.get('peak_traced_mb') is not None:
+                total['peak_traced_mb'] = max(total['peak_traced_mb'] or 0.0, record['peak_traced_mb'])
+        return list(totals.values())
+
+    def print_table(self):
+        print(f"{'stage':<26} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rows':>9} {'rss MB':>8} {'peak MB':>8}")
+        for total in self.summary():
+            rss = f"{total['max_rss_mb']:8.1f}" if total['max_rss_mb'] is not None else f"{'-':>8}"
+            peak = f"{total['peak_traced_mb']:8.1f}" if total['peak_traced_mb'] is not None else f"{'-':>8}"
+            print(f"{total['stage']:<26} {total['calls']:>6} {total['wall_s']:9.3f} {total['cpu_s']:9.3f} "
+                  f"{total['rows']:>9} {rss} {peak}")
+
+
+def _cpu_time():
+    # Include finished child processes: cmdstan fits Prophet models in a subprocess
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB, or None where it can't be read (Windows)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def enable(jsonl_path=None, trace_memory=False, cprofile_path=None):
+    """Start profiling every stage until disable() and return the Profiler"""
+    global _profiler
+    disable()
+    _profiler = Profiler(jsonl_path, trace_memory, cprofile_path)
+    _profiler.start()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = None
+
+
+def is_enabled():
+    return _profiler is not None
+
+
+@contextmanager
+def stage(name, **fields):
+    """Time the enclosed block as one stage.
+
+    Yields a dict for fields only known at the end, such as the row count.
+    Costs nothing beyond the dict when profiling is off.
+    """
+    record = dict(fields)
+    profiler = _profiler
+    if profiler is None:
+        yield record
+        return
+
+    profiler._enter_peak()
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_time()
+    try:
+        yield record
+    finally:
+        cpu = _cpu_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        peak = profiler._exit_peak()
+        record.update({
+            'stage': name,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'max_rss_mb': max_rss_mb(),
+            'pid': os.getpid(),
+        })
+        if peak is not None:
+            record['peak_traced_mb'] = peak / (1024 * 1024)
+        profiler.add(record)
+
+
+def profiled(name, rows=None):
+    """Decorator running the function as a stage; rows(result) gives its row count"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    record['rows'] = rows(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def start_worker(enabled, trace_memory=False):
+    """ProcessPoolExecutor initializer: record stages in the worker when the parent does"""
+    global _profiler
+    # A forked worker inherits the parent's profiler; drop it without writing its files
+    if _profiler is not None and _profiler._cprofile is not None:
+        _profiler._cprofile.disable()
+    _profiler = None
+    if enabled:
+        _profiler = Profiler(trace_memory=trace_memory)
+        _profiler.start()
+
+
+def worker_options():
+    """initargs for start_worker matching the parent's profiling settings"""
+    return (_profiler is not None, _profiler is not None and _profiler.trace_memory)
+
+
+def drain():
+    """Return and forget the stages recorded so far, to ship them from a worker to the parent"""
+    if _profiler is None:
+        return []
+    records, _profiler.records = _profiler.records, []
+    return records
+
+
+def extend(records):
+    """Add stages recorded in a worker process to the active profiler"""
+    if _profiler is not None:
+        for record in records:
+            _profiler.add(record)
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+RECONCILE_METHODS = ('bottom_up', 'top_down', 'ols', 'mint')
+
+
+def summing_matrix(bottom, levels=None, total='GRAND_TOTAL'):
+    """Build the (nodes x courses) summing matrix of the hierarchy.
+
+    levels maps each aggregate node (a college, a campus...) to the courses
+    it contains. The total always sits on top and the courses at the bottom.
+    """
+    levels = dict(levels or {})
+    nodes = [total] + [node for node in levels if node != total] + list(bottom)
+    position = {course: i for i, course in enumerate(bottom)}
+
+    S = np.zeros((len(nodes), len(bottom)))
+    S[0, :] = 1
+    for row, node in enumerate(nodes[1:len(nodes) - len(bottom)], start=1):
+        S[row, [position[course] for course in levels[node]]] = 1
+    S[len(nodes) - len(bottom):, :] = np.eye(len(bottom))
+    return nodes, S
+
+
+def _by_year(forecast):
+    return forecast.drop_duplicates(subset='year', keep='last').set_index('year')
+
+
+def _residual_variance(forecasts, nodes, actual_data):
+    """In-sample variance of each node's fitted history, for MinT weights"""
+    actual = actual_data.pivot_table(index='Original_Year', columns='Course Code',
+                                     values='Enrollment', aggfunc='sum', observed=True)
+    variances = []
+    for node in nodes:
+        fitted = _by_year(forecasts[node])['yhat']
+        residuals = (actual[node] - fitted).dropna() if node in actual else pd.Series(dtype=float)
+        variances.append(residuals.var() if len(residuals) > 1 else np.nan)
+    variances = np.array(variances, dtype=float)
+    # Fall back to equal weights for nodes without usable history
+    fallback = np.nanmean(variances) if np.isfinite(variances).any() else 1.0
+    return np.where(np.isfinite(variances) & (variances > 0), variances, fallback)
+
+
+def _projection(method, nodes, S, based, forecasts, actual_data, years):
+    """Matrix G mapping the stacked base forecasts onto reconciled course forecasts"""
+    n_bottom = S.shape[1]
+    base_rows = [i for i, node in enumerate(nodes) if node in based]
+    G = np.zeros((n_bottom, len(nodes)))
+
+    if method == 'bottom_up':
+        G[:, len(nodes) - n_bottom:] = np.eye(n_bottom)
+        return G
+
+    if method == 'top_down':
+        bottom = nodes[len(nodes) - n_bottom:]
+        if actual_data is not None:
+            history = actual_data[actual_data['Course Code'].isin(bottom)]
+            shares = history.groupby('Course Code', observed=True)['Enrollment'].sum()
+        else:
+            shares = pd.Series({course: _by_year(forecasts[course])['yhat'].reindex(years).sum()
+                                for course in bottom})
+        shares = shares.reindex(bottom).fillna(0).to_numpy(dtype=float)
+        G[:, 0] = shares / shares.sum()
+        return G
+
+    S_base = S[base_rows]
+    if method == 'ols':
+        weights = np.ones(len(base_rows))
+    elif actual_data is not None:
+        weights = 1 / _residual_variance(forecasts, [nodes[i] for i in base_rows], actual_data)
+    else:
+        raise ValueError("MinT reconciliation needs actual_data for the residual variances")
+
+    # Weighted least squares: (S' W^-1 S)^-1 S' W^-1
+    SW = S_base.T * weights
+    G[:, base_rows] = np.linalg.solve(SW @ S_base, SW)
+    return G
+
+
+def reconcile_forecasts(forecasts, method='bottom_up', levels=None, actual_data=None, total='GRAND_TOTAL'):
+    """Make course, aggregate and total forecasts add up.
+
+    Every course in forecasts is a bottom-level series. The base forecasts
+    of all nodes are stacked into a (nodes x years) matrix and reconciled
+    with one projection, S @ G @ Y, over the years every course covers;
+    rows of a base forecast outside those years are kept as they are.
+    bottom_up and top_down need only the courses or only the total
+    respectively, so bottom_up works without a separate total fit. ols and
+    mint (diagonal MinT, weighted by in-sample residual variance from
+    actual_data) use every node that has a base forecast.
+
+    Returns {node: forecast} for the total, every level node and every
+    course. Intervals move with the reconciled yhat; nodes without a base
+    forecast get the bottom-level interval widths summed in quadrature.
+    """
+    if method not in RECONCILE_METHODS:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    levels = levels or {}
+    bottom = [course for course in forecasts if course != total and course not in levels]
+    if not bottom:
+        return dict(forecasts)
+    nodes, S = summing_matrix(bottom, levels, total)
+    based = {node for node in nodes if node in forecasts}
+    if method == 'top_down' and total not in based:
+        raise ValueError("Top-down reconciliation needs a base forecast for the total")
+
+    frames = {node: _by_year(forecasts[node]) for node in based}
+    years = sorted(set.intersection(*(set(frames[course].index) for course in bottom)))
+
+    def stack(column):
+        return np.vstack([
+            frames[node][column].reindex(years).to_numpy(dtype=float) if node in based
+            else np.zeros(len(years))
+            for node in nodes
+        ])
+
+    Y = stack('yhat')
+    G = _projection(method, nodes, S, based, forecasts, actual_data, years)
+    reconciled = S @ (G @ Y)
+
+    # Bottom-level interval half-widths, combined in quadrature for new aggregates
+    lower_width = np.maximum(Y - stack('yhat_lower'), 0)[len(nodes) - len(bottom):]
+    upper_width = np.maximum(stack('yhat_upper') - Y, 0)[len(nodes) - len(bottom):]
+    aggregate_lower = np.sqrt(S @ lower_width ** 2)
+    aggregate_upper = np.sqrt(S @ upper_width ** 2)
+
+    results = {}
+    for i, node in enumerate(nodes):
+        if node in based:
+            # Years outside the shared range (e.g. a longer GRAND_TOTAL history) pass through unchanged
+            frame = frames[node].copy()
+            present = np.isin(years, frame.index)
+            rows = np.asarray(years)[present]
+            shift = (reconciled[i] - Y[i])[present]
+            frame.loc[rows, 'yhat_lower'] += shift
+            frame.loc[rows, 'yhat_upper'] += shift
+            frame.loc[rows, 'yhat'] = reconciled[i][present]
+        else:
+            # Sum the member courses' frames to fill the remaining columns
+            members = [bottom[j] for j in np.flatnonzero(S[i])]
+            frame = sum(frames[course].reindex(years).drop(columns='ds') for course in members)
+            frame.insert(0, 'ds', frames[members[0]]['ds'].reindex(years))
+            frame['yhat_lower'] = reconciled[i] - aggregate_lower[i]
+            frame['yhat_upper'] = reconciled[i] + aggregate_upper[i]
+            frame['yhat'] = reconciled[i]
+        frame = frame.reset_index()
+        frame['year'] = frame['year'].astype(forecasts[bottom[0]]['year'].dtype)
+        results[node] = frame[forecasts[bottom[0]].columns]
+
+    return results
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from .model import draw_forecast
+
+# Only these columns are drawn, so only they are sent to workers and hashed
+PLOT_COLUMNS = ['year', 'yhat', 'yhat_lower', 'yhat_upper']
+
+# One figure per worker process, cleared and reused for every chart it draws
+_figure = None
+
+
+def _init_worker():
+    global _figure
+    # A bare Figure renders through Agg without touching pyplot's backend
+    _figure = Figure(figsize=(12, 6))
+    _figure.add_subplot()
+
+
+def _chart_hash(course, forecast, actual, formats):
+    digest = hashlib.sha256(course.encode('utf-8'))
+    for frame in (forecast, actual):
+        for column in frame.columns:
+            digest.update(np.ascontiguousarray(frame[column].to_numpy(dtype=np.float64)).tobytes())
+    digest.update(','.join(formats).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _render_chart(task):
+    """Draw one course onto the worker's figure and save it in every format"""
+    course, forecast, actual, paths = task
+    if _figure is None:
+        _init_worker()
+    ax = _figure.axes[0]
+    ax.clear()
+    draw_forecast(ax, course, forecast, actual, is_total=course == 'GRAND_TOTAL')
+    _figure.tight_layout()
+    for path in paths:
+        _figure.savefig(path)
+    return course
+
+
+def _safe_name(course):
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(course))
+
+
+def export_forecast_charts(forecasts, actual_data, output_dir, formats=('png',), workers=1):
+    """Render every course chart to files without opening any window.
+
+    Charts are drawn with the same draw_forecast as plot_forecasts, spread
+    over worker processes that each reuse a single figure. A chart whose
+    forecast, history and formats are unchanged since the last export is
+    skipped. output_dir/index.json lists each course's files and hash and
+    is returned.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, 'index.json')
+    previous = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            previous = json.load(f)
+
+    index = {}
+    tasks = []
+    for course, forecast in forecasts.items():
+        forecast = forecast[PLOT_COLUMNS]
+        actual = actual_data.loc[actual_data['Course Code'] == course, ['Original_Year', 'Enrollment']]
+        files = [f"{_safe_name(course)}.{fmt}" for fmt in formats]
+        digest = _chart_hash(str(course), forecast, actual, formats)
+        index[course] = {'files': files, 'hash': digest}
+
+        unchanged = previous.get(course, {}).get('hash') == digest
+        if unchanged and all(os.path.exists(os.path.join(output_dir, name)) for name in files):
+            continue
+        tasks.append((course, forecast, actual, [os.path.join(output_dir, name) for name in files]))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        _init_worker()
+        rendered = [_render_chart(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            rendered = list(executor.map(_render_chart, tasks, chunksize=chunksize))
+
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    print(f"Rendered {len(rendered)} charts, {len(index) - len(rendered)} unchanged")
+    return index
@@ -0,0 +1,100 @@
+import json
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# Rows of the result block; every consumer of a forecast only reads these
+RESULT_COLUMNS = ['year', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def compact_forecast(forecast):
+    """The RESULT_COLUMNS of one forecast frame as a (4, rows) float32 block"""
+    return np.vstack([forecast[column].to_numpy(dtype=np.float32) for column in RESULT_COLUMNS])
+
+
+class ForecastResults(Mapping):
+    """Forecasts of many courses in one float32 struct-of-arrays block.
+
+    block has one row per RESULT_COLUMNS entry and one column per forecast
+    row (years are exact in float32); course i owns columns
+    offsets[i]:offsets[i + 1]. It reads like the {course: DataFrame} dict
+    forecast_all_courses used to return, with each frame holding only
+    RESULT_COLUMNS and built on access.
+    """
+
+    def __init__(self, courses, block, offsets):
+        self.courses = list(courses)
+        self.block = block
+        self.offsets = offsets
+        self._positions = {course: i for i, course in enumerate(self.courses)}
+
+    @classmethod
+    def from_blocks(cls, courses, blocks):
+        blocks = list(blocks)
+        sizes = [block.shape[1] for block in blocks]
+        offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        block = np.hstack(blocks) if blocks else np.zeros((len(RESULT_COLUMNS), 0), dtype=np.float32)
+        return cls(courses, block, offsets)
+
+    @classmethod
+    def from_forecasts(cls, forecasts):
+        """Compact a {course: forecast frame} dict"""
+        if isinstance(forecasts, ForecastResults):
+            return forecasts
+        return cls.from_blocks(forecasts.keys(), (compact_forecast(f) for f in forecasts.values()))
+
+    def arrays(self, course):
+        """(year, yhat, yhat_lower, yhat_upper) of one course; the float32 arrays are views into the block"""
+        i = self._positions[course]
+        values = self.block[:, self.offsets[i]:self.offsets[i + 1]]
+        return values[0].astype(np.int32), values[1], values[2], values[3]
+
+    def __getitem__(self, course):
+        i = self._positions[course]
+        values = self.block[:, self.offsets[i]:self.offsets[i + 1]]
+        frame = pd.DataFrame(values[1:].T, columns=RESULT_COLUMNS[1:])
+        frame.insert(0, 'year', values[0].astype(np.int32))
+        return frame
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __contains__(self, course):
+        return course in self._positions
+
+    @property
+    def nbytes(self):
+        return self.block.nbytes + self.offsets.nbytes
+
+    def to_frame(self):
+        """Every course's rows in one long frame with a categorical course column"""
+        codes = np.repeat(np.arange(len(self.courses), dtype=np.int32), np.diff(self.offsets))
+        frame = pd.DataFrame({
+            'course': pd.Categorical.from_codes(codes, categories=pd.Index(self.courses, dtype=object)),
+            'year': self.block[0].astype(np.int32),
+        })
+        for row, column in enumerate(RESULT_COLUMNS[1:], start=1):
+            frame[column] = self.block[row]
+        return frame
+
+    def to_bytes(self):
+        """A length-prefixed JSON header followed by the raw block: one copy of the data"""
+        header = json.dumps({
+            'courses': [str(course) for course in self.courses],
+            'offsets': self.offsets.tolist(),
+            'rows': len(RESULT_COLUMNS),
+        }).encode('utf-8')
+        return len(header).to_bytes(8, 'little') + header + self.block.tobytes()
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        """Inverse of to_bytes; the block is a read-only view of buffer, not a copy"""
+        size = int.from_bytes(buffer[:8], 'little')
+        header = json.loads(bytes(buffer[8:8 + size]))
+        block = np.frombuffer(buffer, dtype=np.float32, offset=8 + size).reshape(header['rows'], -1)
+        return cls(header['courses'], block, np.array(header['offsets'], dtype=np.int64))
@@ -0,0 +1,188 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from . import profiling
+from .model import (
+    FORECAST_END_YEAR,
+    growth_and_bounds_from_statistics,
+    growth_params,
+    growth_statistics,
+    iter_course_groups,
+    postprocess_forecast,
+    predict_raw_forecasts,
+)
+from .results import ForecastResults, compact_forecast
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+class ScenarioPlanner:
+    """Answers what-if questions about one loaded dataset.
+
+    Everything that does not depend on the scenario is computed once and
+    kept: the per-course frames, each course's growth statistics and, for
+    the Prophet engines, the raw prediction of every (course, cap, floor)
+    fit. A scenario then only reruns the cheap tail: weighted growth and
+    bounds, post-processing and adjustments. Changing growth weights or
+    dampening reuses the fits; only caps that move a course's bounds
+    trigger a new fit for that course. The vectorized engine is cheap
+    enough to rerun whole.
+    """
+
+    def __init__(self, df, engine='prophet', cache=None):
+        if engine not in ('prophet', 'prophet_batch', 'vectorized'):
+            raise ValueError(f"Unknown forecasting engine: {engine}")
+        self.df = df
+        self.engine = engine
+        self.cache = cache
+        self._groups = None
+        self._statistics = {}
+        self._raw = {}
+        self._baselines = {}
+
+    @property
+    def groups(self):
+        """{course: history} for GRAND_TOTAL and every course with 3+ years, as forecast_all_courses uses"""
+        if self._groups is None:
+            groups = {course: data for course, data in iter_course_groups(self.df) if len(data) >= 3}
+            total = groups.pop('GRAND_TOTAL', None)
+            self._groups = {'GRAND_TOTAL': total, **groups} if total is not None else groups
+        return self._groups
+
+    def _growth_statistics(self, course):
+        if course not in self._statistics:
+            self._statistics[course] = growth_statistics(self.groups[course]['Enrollment'])
+        return self._statistics[course]
+
+    def _end_year(self, end_year, horizon):
+        if horizon is not None:
+            return int(self.df['Original_Year'].max()) + horizon + 1
+        return end_year or FORECAST_END_YEAR
+
+    def _prophet_forecasts(self, course_params, end_year):
+        plans, jobs = [], {}
+        for course, data in self.groups.items():
+            params = course_params[course]
+            weighted_growth, cap, floor = growth_and_bounds_from_statistics(
+                self._growth_statistics(course), course, params)
+            job = (course, cap, floor)
+            plans.append((course, weighted_growth, cap, floor))
+            covered = self._raw.get(job, (None, 0))[1]
+            if covered < end_year:
+                jobs.setdefault(job, (data, params))
+
+        if jobs:
+            # Predict at least to the default horizon so shorter what-ifs reuse it
+            predict_to = max(end_year, FORECAST_END_YEAR)
+            raw = predict_raw_forecasts(jobs, predict_to, batch=self.engine == 'prophet_batch', cache=self.cache)
+            for job, forecast in raw.items():
+                self._raw[job] = (forecast, predict_to)
+
+        blocks = {}
+        for course, weighted_growth, cap, floor in plans:
+            if (course, cap, floor) not in self._raw:
+                continue
+            raw, _ = self._raw[(course, cap, floor)]
+            # Post-processing only looks backwards, so trimming the raw prediction equals predicting less
+            raw = raw[raw['ds'].dt.year < end_year].copy()
+            last_year = int(self.groups[course]['Original_Year'].max())
+            blocks[course] = compact_forecast(postprocess_forecast(raw, weighted_growth, cap, floor, last_year))
+        return blocks
+
+    def _vectorized_forecasts(self, course_params, end_year):
+        from .vectorized import forecast_all_courses_vectorized
+
+        # One vectorized pass per distinct parameter set
+        by_params = {}
+        for course in self.groups:
+            by_params.setdefault(_params_key(course_params[course]), []).append(course)
+
+        blocks = {}
+        for courses in by_params.values():
+            subset = self.df[self.df['Course Code'].isin(courses)]
+            results = forecast_all_courses_vectorized(subset, compact=True, params=course_params[courses[0]],
+                                                      end_year=end_year)
+            for i, course in enumerate(results.courses):
+                blocks[course] = results.block[:, results.offsets[i]:results.offsets[i + 1]]
+        return blocks
+
+    def forecast(self, params=None, course_params=None, adjustments=None, end_year=None, horizon=None):
+        """Forecast every course under one scenario.
+
+        params overrides GROWTH_PARAMS for every course and course_params
+        overrides them further per course. adjustments multiply a course's
+        forecast past its history, e.g. {'BSN': 1.1} for "BSN 10% above
+        the model". horizon (years past the data) or end_year sets how far
+        to forecast. Returns a ForecastResults in the usual course order.
+        """
+        end_year = self._end_year(end_year, horizon)
+        course_params = dict(course_params or {})
+        adjustments = dict(adjustments or {})
+        unknown = (set(course_params) | set(adjustments)) - set(self.groups)
+        if unknown:
+            raise ValueError(f"Unknown courses: {', '.join(sorted(map(str, unknown)))}")
+        base = {**growth_params(params)}
+        course_params = {course: {**base, **course_params.get(course, {})} for course in self.groups}
+        for overrides in course_params.values():
+            growth_params(overrides)
+
+        with profiling.stage('scenario_forecast', rows=len(self.groups)):
+            if self.engine == 'vectorized':
+                blocks = self._vectorized_forecasts(course_params, end_year)
+            else:
+                blocks = self._prophet_forecasts(course_params, end_year)
+
+            for course, factor in adjustments.items():
+                if course not in blocks:
+                    continue
+                block = blocks[course].copy()
+                future = block[0] > self.groups[course]['Original_Year'].max()
+                block[1:, future] *= factor
+                blocks[course] = block
+
+        courses = [course for course in self.groups if course in blocks]
+        return ForecastResults.from_blocks(courses, [blocks[course] for course in courses])
+
+    def baseline(self, end_year=None, horizon=None):
+        """The unmodified forecast, memoized per end year"""
+        end_year = self._end_year(end_year, horizon)
+        if end_year not in self._baselines:
+            self._baselines[end_year] = self.forecast(end_year=end_year)
+        return self._baselines[end_year]
+
+    def run(self, params=None, course_params=None, adjustments=None, end_year=None, horizon=None):
+        """Forecast a scenario and compare it with the baseline.
+
+        Returns {'forecasts', 'baseline', 'deltas', 'total_delta'}. deltas
+        has one row per course and future year with both forecasts, the
+        difference and the percentage change; total_delta sums the course
+        differences per year (GRAND_TOTAL is fitted on its own and not
+        included).
+        """
+        end_year = self._end_year(end_year, horizon)
+        forecasts = self.forecast(params, course_params, adjustments, end_year=end_year)
+        baseline = self.baseline(end_year=end_year)
+
+        last_year = int(self.df['Original_Year'].max())
+
+        def future(results):
+            frame = results.to_frame()
+            frame = frame[frame['year'] > last_year]
+            return frame[['year', 'yhat']].assign(course=frame['course'].astype(str))
+
+        merged = future(baseline).merge(future(forecasts), on=['course', 'year'], suffixes=('_baseline', '_scenario'))
+        deltas = pd.DataFrame({
+            'course': merged['course'].astype(str).to_numpy(),
+            'year': merged['year'].to_numpy(),
+            'baseline': merged['yhat_baseline'].to_numpy(dtype=np.float64),
+            'scenario': merged['yhat_scenario'].to_numpy(dtype=np.float64),
+        })
+        deltas['delta'] = deltas['scenario'] - deltas['baseline']
+        deltas['delta_pct'] = deltas['delta'] / deltas['baseline'].where(deltas['baseline'] != 0) * 100
+        total_delta = deltas[deltas['course'] != 'GRAND_TOTAL'].groupby('year')['delta'].sum()
+
+        return {'forecasts': forecasts, 'baseline': baseline, 'deltas': deltas, 'total_delta': total_delta}
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from . import profiling
+from .model import FORECAST_END_YEAR, years_to_datetime
+
+# Segment series forecast by default: a name and the student columns that define it
+SEGMENTS = {
+    'course': ('curricularProgram',),
+    'course_sex': ('curricularProgram', 'sex'),
+    'course_feeder': ('curricularProgram', 'feederSchool'),
+    'course_income': ('curricularProgram', 'familyMonthlyIncome'),
+    'barangay': ('barangay',),
+}
+
+# student_data.csv names some Dashboard columns differently
+STUDENT_ALIASES = {'course': 'curricularProgram', 'gender': 'sex', 'feederSchoolType': 'feederSchool'}
+
+
+def load_students(path):
+    """Student-level records from a CSV or Parquet export, with Dashboard column names"""
+    if str(path).endswith('.parquet'):
+        students = pd.read_parquet(path)
+    else:
+        students = pd.read_csv(path, dtype={'studentID': str})
+    return students.rename(columns={old: new for old, new in STUDENT_ALIASES.items() if new not in students})
+
+
+def student_years(students):
+    """The year each student counts towards.
+
+    A 'year' column is used as-is; otherwise Dashboard rows count in the
+    year they were created and student_data.csv rows in the entry year
+    their studentID starts with ('21-00001' is 2021).
+    """
+    if 'year' in students:
+        return students['year'].to_numpy(dtype=np.int64)
+    if 'created_at' in students:
+        return pd.to_datetime(students['created_at'], utc=True, format='ISO8601').dt.year.to_numpy(dtype=np.int64)
+    if 'studentID' in students:
+        prefix = students['studentID'].astype(str).str.extract(r'^(\d{2})-', expand=False)
+        if prefix.notna().all():
+            return prefix.astype(np.int64).to_numpy() + 2000
+    raise ValueError("Students need a year, created_at or studentID (YY-NNNNN) column")
+
+
+def segment_label(dimension, values):
+    return f"{dimension}:{'|'.join(map(str, values))}"
+
+
+def segment_counts(students, segments=None, years=None):
+    """Count students per (segment, year) for every segment at once.
+
+    Each column is factorized once, each segment's rows are encoded as one
+    integer (mixed radix over its columns' codes, offset so segments never
+    collide, times the number of years plus the year code), and all
+    segments are counted together with a single np.unique. Students with a
+    missing value in a segment's columns are left out of that segment only.
+
+    Returns (counts, index): counts is a prepared enrollment frame (Year,
+    Course Code, Enrollment, Original_Year) with one row per segment and
+    year, its Course Code the segment label. Each segment runs from its
+    first year to the last year of the data, with 0 for years it had no
+    students. index has one row per segment label with its dimension and
+    attribute values.
+    """
+    segments = SEGMENTS if segments is None else segments
+    years = student_years(students) if years is None else np.asarray(years, dtype=np.int64)
+    missing = sorted({column for columns in segments.values() for column in columns} - set(students))
+    if missing:
+        raise KeyError(f"Students have no column {', '.join(missing)}")
+
+    year_codes, year_values = pd.factorize(years, sort=True)
+    n_years = len(year_values)
+    codes, categories = {}, {}
+    for column in {column for columns in segments.values() for column in columns}:
+        codes[column], categories[column] = pd.factorize(students[column], sort=True)
+
+    keys, offsets = [], [0]
+    with profiling.stage('segment_counts', rows=len(students), segments=len(segments)):
+        for columns in segments.values():
+            key = np.zeros(len(students), dtype=np.int64)
+            present = year_codes >= 0
+            for column in columns:
+                key = key * len(categories[column]) + codes[column]
+                present &= codes[column] >= 0
+            keys.append((offsets[-1] + key[present]) * n_years + year_codes[present])
+            offsets.append(offsets[-1] + int(np.prod([len(categories[column]) for column in columns])))
+
+        cells, counts = np.unique(np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64),
+                                  return_counts=True)
+
+    combination, year_code = np.divmod(cells, n_years)
+
+    # Decode each distinct segment back to its attribute values
+    distinct, position = np.unique(combination, return_inverse=True)
+    distinct_segment = np.searchsorted(offsets, distinct, side='right') - 1
+    distinct_local = distinct - np.asarray(offsets)[distinct_segment]
+    dimensions = list(segments)
+    attributes = sorted(codes)
+    index = {'dimension': np.array(dimensions, dtype=object)[distinct_segment]}
+    index.update({column: np.full(len(distinct), None, dtype=object) for column in attributes})
+    labels = np.empty(len(distinct), dtype=object)
+    for s, (dimension, columns) in enumerate(segments.items()):
+        rows = np.flatnonzero(distinct_segment == s)
+        remainder = distinct_local[rows]
+        values = {}
+        for column in reversed(columns):
+            remainder, value = np.divmod(remainder, len(categories[column]))
+            values[column] = np.asarray(categories[column], dtype=object)[value]
+            index[column][rows] = values[column]
+        labels[rows] = [segment_label(dimension, parts)
+                        for parts in zip(*(values[column] for column in columns))]
+    index = pd.DataFrame(index, index=pd.Index(labels, name='segment'))
+    index['dimension'] = index['dimension'].astype(pd.CategoricalDtype(dimensions))
+
+    # Every segment runs from its first year to the last year of the data, with
+    # explicit zeros for years nobody in it enrolled
+    year = np.asarray(year_values, dtype=np.int64)[year_code]
+    first_year = np.full(len(distinct), year.max() if len(year) else 0)
+    np.minimum.at(first_year, position, year)
+    lengths = year.max() + 1 - first_year if len(year) else np.zeros(0, dtype=np.int64)
+    starts = np.zeros(len(distinct), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    segment = np.repeat(np.arange(len(distinct)), lengths)
+    filled_year = first_year[segment] + np.arange(len(segment)) - starts[segment]
+    enrollment = np.zeros(len(segment), dtype=np.int64)
+    enrollment[starts[position] + year - first_year[position]] = counts
+
+    counts = pd.DataFrame({
+        'Year': years_to_datetime(filled_year),
+        'Course Code': pd.Categorical.from_codes(segment, categories=pd.Index(labels, dtype=object)),
+        'Enrollment': enrollment,
+        'Original_Year': filled_year,
+    })
+    return counts, index
+
+
+class SegmentForecasts:
+    """Forecasts of many segment series in one ForecastResults, with an index of what each segment is.
+
+    results is keyed on segment labels ('course_sex:BSIT|Female') and
+    index maps every label to its dimension and attribute values, so a
+    dimension or attribute filter selects segments without touching the
+    forecast block.
+    """
+
+    def __init__(self, index, results):
+        self.index = index
+        self.results = results
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def nbytes(self):
+        return self.results.nbytes
+
+    def segments(self, dimension=None, **attributes):
+        """Labels of the forecast segments in dimension whose attributes match, e.g. curricularProgram='BSIT'"""
+        index = self.index.reindex(self.results.courses)
+        mask = np.ones(len(index), dtype=bool)
+        if dimension is not None:
+            mask &= (index['dimension'] == dimension).to_numpy()
+        for column, value in attributes.items():
+            mask &= (index[column] == value).to_numpy()
+        return list(index.index[mask])
+
+    def __getitem__(self, segment):
+        return self.results[segment]
+
+    def to_frame(self, dimension=None):
+        """One long frame of the forecast rows with each segment's dimension and attribute columns"""
+        frame = self.results.to_frame().rename(columns={'course': 'segment'})
+        index = self.index.reindex(self.results.courses)
+        codes = frame['segment'].cat.codes.to_numpy()
+        if dimension is not None:
+            keep = (index['dimension'] == dimension).to_numpy()
+            frame, codes = frame[keep[codes]], codes[keep[codes]]
+            # Only the attribute columns that dimension is defined by
+            index = index.loc[:, index[keep].notna().any()]
+        for position, column in enumerate(index.columns, start=1):
+            frame.insert(position, column, pd.Categorical(index[column].to_numpy()[codes]))
+        return frame.reset_index(drop=True)
+
+
+def forecast_segments(students, segments=None, params=None, end_year=None, horizon=None, years=None):
+    """Aggregate student records into segment series and forecast them all at once.
+
+    Counting is one grouped pass (segment_counts) and forecasting one call
+    of the vectorized engine over every segment, so thousands of series
+    cost a few array operations rather than a frame and a model each.
+    Segments with fewer than 3 years are not forecast. horizon (years past
+    the data) or end_year sets how far to forecast; params overrides
+    GROWTH_PARAMS. Returns a SegmentForecasts.
+    """
+    from .vectorized import forecast_all_courses_vectorized
+
+    counts, index = segment_counts(students, segments, years)
+    if horizon is not None:
+        end_year = int(counts['Original_Year'].max()) + horizon + 1
+    with profiling.stage('forecast_segments', rows=len(index)):
+        results = forecast_all_courses_vectorized(counts, compact=True, params=params,
+                                                  end_year=end_year or FORECAST_END_YEAR)
+    return SegmentForecasts(index, results)
@@ -0,0 +1,381 @@
+"""Long-lived HTTP service that serves enrollment forecasts from memory.
+
+Run from the repository root, for example:
+
+    python -m src.lib.ml.service --input src/lib/ml/data/EnrollmentData.csv --port 8765
+
+GET /enrollments?courseCode=BSIT returns the same rows as the Next.js
+enrollments route reads from EnrollmentData (year, enrollment, isActual,
+lowerBound, upperBound), and ?college=CCS sums the courses listed for that
+college in --levels. /courses lists the forecast series, /health and
+/metrics report on the service itself.
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from .model import forecast_all_courses, load_and_prepare_data
+
+ALL_COLLEGES = 'All Colleges'
+
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    Entries are evicted least recently used first once there are more than
+    max_entries or their sizes add up to more than max_bytes. get_or_compute
+    coalesces concurrent misses on one key into a single computation, and
+    with stale_while_revalidate serves an expired entry while one
+    background thread recomputes it.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600.0, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+
+    def _lookup(self, key, keep_stale=False):
+        """(entry, expired) for key; expired entries are dropped unless keep_stale"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        value, size, expires = entry
+        expired = expires < time.monotonic()
+        if expired and not keep_stale:
+            del self._entries[key]
+            self.bytes -= size
+            self.expirations += 1
+            return None, False
+        self._entries.move_to_end(key)
+        return entry, expired
+
+    def _store(self, key, value, size):
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def _compute(self, key, future, compute, sizeof):
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._store(key, value, sizeof(value))
+            del self._pending[key]
+        future.set_result(value)
+
+    def _refresh(self, key, future, compute, sizeof):
+        self._compute(key, future, compute, sizeof)
+        if future.exception() is not None:
+            # The stale entry stays, so the next request retries the refresh
+            with self._lock:
+                self.refresh_errors += 1
+            print(f"Background refresh of {key[0]} failed: {future.exception()}")
+
+    def get_or_compute(self, key, compute, sizeof=lambda value: 0, stale_while_revalidate=False):
+        """Return the cached value for key, or compute it once however many threads ask.
+
+        With stale_while_revalidate an expired value is returned at once and
+        recomputed in a background thread instead of on the caller's path.
+        """
+        with self._lock:
+            entry, expired = self._lookup(key, keep_stale=stale_while_revalidate)
+            if entry is not None and not expired:
+                self.hits += 1
+                return entry[0]
+            future = self._pending.get(key)
+            if entry is not None:
+                self.stale_hits += 1
+                if future is None:
+                    future = self._pending[key] = Future()
+                    threading.Thread(target=self._refresh, args=(key, future, compute, sizeof),
+                                     daemon=True).start()
+                return entry[0]
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if owner:
+            self._compute(key, future, compute, sizeof)
+        return future.result()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'refresh_errors': self.refresh_errors,
+                'in_flight': len(self._pending),
+            }
+
+
+class ForecastService:
+    """Loads, forecasts and renders JSON on demand, keeping every step in one LRUCache.
+
+    Cache keys include the input file's size and modification time, so a
+    replaced export is picked up on the next request without a restart.
+    Loaded data and forecasts past their ttl keep being served while they
+    are recomputed in the background, so an expiry never puts a refit on
+    the request path. Every forecasts computation gets a new generation,
+    which rendered JSON is keyed on, so a refresh retires the bodies built
+    from the forecasts it replaced.
+    """
+
+    def __init__(self, input_path, engine='prophet', workers=1, forecast_cache=None, levels=None,
+                 max_entries=256, ttl=3600.0, max_bytes=512 * 1024 * 1024):
+        self.input_path = input_path
+        self.engine = engine
+        self.workers = workers
+        self.forecast_cache = forecast_cache
+        self.levels = levels or {}
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.compute_seconds = 0.0
+        self._counter_lock = threading.Lock()
+        self._generations = itertools.count()
+
+    def _version(self):
+        stat = os.stat(self.input_path)
+        return (self.input_path, stat.st_size, stat.st_mtime_ns)
+
+    def _timed(self, compute):
+        def run():
+            start = time.perf_counter()
+            try:
+                return compute()
+            finally:
+                with self._counter_lock:
+                    self.compute_seconds += time.perf_counter() - start
+        return run
+
+    def data(self):
+        """The prepared enrollment frame with every course's history, split once"""
+        def load():
+            df = load_and_prepare_data(self.input_path)
+            history = {}
+            for course, positions in df.groupby('Course Code', sort=False, observed=True).indices.items():
+                rows = df.iloc[positions].sort_values('Original_Year', kind='stable')
+                history[str(course)] = (rows['Original_Year'].to_numpy(dtype=np.int64),
+                                        rows['Enrollment'].to_numpy(dtype=np.float64))
+            return df, history
+
+        return self.cache.get_or_compute(('data',) + self._version(), self._timed(load),
+                                         sizeof=lambda value: int(value[0].memory_usage(deep=True).sum()),
+                                         stale_while_revalidate=True)
+
+    def _forecasts(self):
+        """(generation, forecasts); the generation changes whenever the forecasts are recomputed"""
+        def compute():
+            df, _ = self.data()
+            results = forecast_all_courses(df, workers=self.workers, cache=self.forecast_cache, engine=self.engine)
+            return next(self._generations), results
+
+        return self.cache.get_or_compute(('forecasts', self.engine) + self._version(), self._timed(compute),
+                                         sizeof=lambda value: value[1].nbytes, stale_while_revalidate=True)
+
+    def forecasts(self):
+        return self._forecasts()[1]
+
+    def courses(self):
+        return [str(course) for course in self.forecasts()]
+
+    def _course_rows(self, course, history, forecasts, last_year):
+        years, enrollment = history.get(course, (np.zeros(0, dtype=np.int64), np.zeros(0)))
+        rows = {int(year): {"year": int(year), "enrollment": float(value), "isActual": True,
+                            "lowerBound": None, "upperBound": None}
+                for year, value in zip(years, enrollment)}
+        if course in forecasts:
+            year, yhat, lower, upper = forecasts.arrays(course)
+            future = year > last_year
+            for y, value, low, high in zip(year[future], yhat[future], lower[future], upper[future]):
+                rows[int(y)] = {"year": int(y), "enrollment": float(value), "isActual": False,
+                                "lowerBound": float(low), "upperBound": float(high)}
+        return rows
+
+    def enrollments(self, course=None, college=None):
+        """JSON rows for one course, one college (summed over its courses) or everything"""
+        if college == ALL_COLLEGES or (college is None and course in (None, ALL_COLLEGES)):
+            course, college = 'GRAND_TOTAL', None
+        if college is not None and college not in self.levels:
+            raise KeyError(college)
+        df, history = self.data()
+        generation, forecasts = self._forecasts()
+
+        def render():
+            last_year = int(df['Original_Year'].max())
+            if college is None:
+                if course not in history and course not in forecasts:
+                    raise KeyError(course)
+                rows = self._course_rows(course, history, forecasts, last_year)
+            else:
+                rows = {}
+                for member in self.levels[college]:
+                    for year, row in self._course_rows(member, history, forecasts, last_year).items():
+                        total = rows.setdefault(year, {"year": year, "enrollment": 0.0, "isActual": row["isActual"],
+                                                       "lowerBound": None, "upperBound": None})
+                        total["enrollment"] += row["enrollment"]
+                        if row["lowerBound"] is not None:
+                            # Interval half-widths add in quadrature, as reconcile does for new aggregates
+                            total["_low"] = total.get("_low", 0.0) + (row["enrollment"] - row["lowerBound"]) ** 2
+                            total["_high"] = total.get("_high", 0.0) + (row["upperBound"] - row["enrollment"]) ** 2
+                for row in rows.values():
+                    if "_low" in row:
+                        row["lowerBound"] = row["enrollment"] - row.pop("_low") ** 0.5
+                        row["upperBound"] = row["enrollment"] + row.pop("_high") ** 0.5
+            return json.dumps([rows[year] for year in sorted(rows)]).encode('utf-8')
+
+        key = ('json', self.engine, course, college, generation) + self._version()
+        return self.cache.get_or_compute(key, self._timed(render), sizeof=len)
+
+    def count_request(self, failed=False):
+        with self._counter_lock:
+            self.requests += 1
+            self.errors += failed
+
+    def metrics(self):
+        with self._counter_lock:
+            counters = {'requests': self.requests, 'errors': self.errors,
+                        'compute_seconds': round(self.compute_seconds, 6)}
+        return {'uptime_s': round(time.time() - self.started, 3), 'engine': self.engine,
+                **counters, 'cache': self.cache.stats()}
+
+
+class ForecastRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, value):
+        self._send(status, json.dumps(value).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        failed = False
+        try:
+            if url.path == '/health':
+                self._send_json(200, {'status': 'ok', 'input': self.service.input_path})
+            elif url.path == '/metrics':
+                self._send_json(200, self.service.metrics())
+            elif url.path == '/courses':
+                self._send_json(200, self.service.courses())
+            elif url.path == '/enrollments':
+                self._send(200, self.service.enrollments(query.get('courseCode'), query.get('college')))
+            else:
+                failed = True
+                self._send_json(404, {'error': f"Unknown path {url.path}"})
+        except KeyError as e:
+            failed = True
+            self._send_json(404, {'error': f"No forecast for {e.args[0]}"})
+        except Exception as e:
+            failed = True
+            self._send_json(500, {'error': str(e)})
+        finally:
+            self.service.count_request(failed)
+
+    def log_message(self, format, *args):
+        # Metrics cover request counts; keep the console for errors
+        pass
+
+
+def serve(service, host='127.0.0.1', port=8765, warm=True):
+    """Serve service over HTTP until interrupted, optionally forecasting everything up front"""
+    if warm:
+        service.forecasts()
+    handler = type('Handler', (ForecastRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving forecasts for {service.input_path} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', default=os.getenv("FORECAST_INPUT"), required=not os.getenv("FORECAST_INPUT"))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--engine', choices=['prophet', 'prophet_batch', 'vectorized'], default='prophet')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--cache-dir', help="On-disk ForecastCache shared with batch runs")
+    parser.add_argument('--levels', help="JSON file mapping each college to its course codes")
+    parser.add_argument('--ttl', type=float, default=3600.0, help="Seconds before a cached result is recomputed")
+    parser.add_argument('--max-entries', type=int, default=256)
+    parser.add_argument('--max-mb', type=float, default=512.0)
+    parser.add_argument('--no-warm', action='store_true', help="Forecast on the first request instead of at start")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    levels = None
+    if args.levels:
+        with open(args.levels) as f:
+            levels = json.load(f)
+    forecast_cache = None
+    if args.cache_dir:
+        from .cache import ForecastCache
+        forecast_cache = ForecastCache(args.cache_dir)
+
+    service = ForecastService(args.input, engine=args.engine, workers=args.workers, forecast_cache=forecast_cache,
+                              levels=levels, max_entries=args.max_entries, ttl=args.ttl,
+                              max_bytes=int(args.max_mb * 1024 * 1024))
+    serve(service, args.host, args.port, warm=not args.no_warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+# Checks and their default thresholds
+MAX_JUMP = 1.0  # a year-on-year change beyond +100% / -50% is flagged
+MIN_YEARS = 3  # forecast_all_courses skips shorter series anyway
+MAX_GAP_FRACTION = 0.5  # series missing more of their year range than this are excluded
+TOTAL_TOLERANCE = 0.01  # relative difference between GRAND_TOTAL and the course sum
+
+REPORT_COLUMNS = ['course', 'year', 'issue', 'action', 'value']
+
+
+def _issues(frame, mask, issue, action, value=None):
+    mask = np.asarray(mask, dtype=bool)
+    return pd.DataFrame({
+        'course': frame['Course Code'].to_numpy()[mask].astype(str),
+        'year': frame['Original_Year'].to_numpy()[mask],
+        'issue': issue,
+        'action': action,
+        'value': (frame['Enrollment'].to_numpy(dtype=np.float64) if value is None else value)[mask],
+    })
+
+
+def validate_enrollment(df, repair=True, repair_spikes=False, max_jump=MAX_JUMP, min_years=MIN_YEARS,
+                        max_gap_fraction=MAX_GAP_FRACTION, total='GRAND_TOTAL', total_tolerance=TOTAL_TOLERANCE):
+    """Data-quality checks over a prepared enrollment frame, as whole-column operations.
+
+    Flags missing, zero or negative enrollment, duplicate (year, course)
+    rows (including codes that only differed by whitespace before
+    stripping), gaps in a course's years, outlier jumps, spikes (a jump
+    immediately reversed) and years where GRAND_TOTAL disagrees with the
+    course sum. With repair, bad values and duplicates are dropped (the
+    last of conflicting duplicates is kept) and series that are too short
+    or mostly gaps are excluded, so no fit is started on them;
+    repair_spikes also replaces spikes with the geometric mean of their
+    neighbours. Row order is kept.
+
+    Returns the checked frame and a report with one row per finding.
+    """
+    report = []
+
+    values = df['Enrollment'].to_numpy(dtype=np.float64)
+    missing = np.isnan(values)
+    non_positive = ~missing & (values <= 0)
+    report.append(_issues(df, missing, 'missing', 'dropped' if repair else 'flagged'))
+    report.append(_issues(df, non_positive, 'non_positive', 'dropped' if repair else 'flagged'))
+    if repair:
+        df = df[~(missing | non_positive)]
+
+    keys = ['Course Code', 'Original_Year']
+    duplicate = df.duplicated(keys, keep='last').to_numpy()
+    exact = df.duplicated(keys + ['Enrollment'], keep='last').to_numpy()
+    report.append(_issues(df, exact, 'duplicate', 'dropped' if repair else 'flagged'))
+    report.append(_issues(df, duplicate & ~exact, 'conflicting_duplicate', 'dropped' if repair else 'flagged'))
+    if repair:
+        df = df[~duplicate]
+
+    # Walk every series in year order at once: neighbours are adjacent rows of the same course
+    codes, courses = pd.factorize(df['Course Code'])
+    years = df['Original_Year'].to_numpy(dtype=np.int64)
+    values = df['Enrollment'].to_numpy(dtype=np.float64)
+    order = np.lexsort((years, codes))
+    sorted_frame = df.iloc[order]
+    c, y, v = codes[order], years[order], values[order]
+
+    same = np.zeros(len(c), dtype=bool)
+    same[1:] = c[1:] == c[:-1]
+    step = np.zeros(len(c), dtype=np.int64)
+    step[1:] = y[1:] - y[:-1]
+    gap = same & (step > 1)
+    report.append(_issues(sorted_frame, gap, 'gap', 'flagged', value=(step - 1).astype(np.float64)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_change = np.zeros(len(c))
+        log_change[1:] = np.log(v[1:] / v[:-1])
+    jump = same & (np.abs(log_change) > np.log1p(max_jump))
+    jump_out = np.append(jump[1:], False)
+    change_out = np.append(log_change[1:], 0.0)
+    spike = jump & jump_out & (np.sign(log_change) != np.sign(change_out))
+    report.append(_issues(sorted_frame, jump & ~spike, 'jump', 'flagged'))
+    report.append(_issues(sorted_frame, spike, 'spike', 'repaired' if repair and repair_spikes else 'flagged'))
+    if repair and repair_spikes and spike.any():
+        positions = np.flatnonzero(spike)
+        repaired = v.copy()
+        repaired[positions] = np.sqrt(v[positions - 1] * v[positions + 1])
+        values = values.copy()
+        values[order] = repaired
+        df = df.assign(Enrollment=values)
+
+    # Whole-series checks
+    counts = np.bincount(codes, minlength=len(courses))
+    first = np.full(len(courses), np.iinfo(np.int64).max)
+    last = np.full(len(courses), np.iinfo(np.int64).min)
+    np.minimum.at(first, codes, years)
+    np.maximum.at(last, codes, years)
+    span = last - first + 1
+    too_short = counts < min_years
+    gappy = ~too_short & ((span - counts) / span > max_gap_fraction)
+    excluded_series = too_short | gappy
+    for mask, issue in ((too_short, 'too_short'), (gappy, 'too_many_gaps')):
+        if mask.any():
+            report.append(pd.DataFrame({'course': np.asarray(courses)[mask].astype(str), 'year': last[mask],
+                                        'issue': issue, 'action': 'excluded' if repair else 'flagged',
+                                        'value': counts[mask].astype(np.float64)}))
+    if repair and excluded_series.any():
+        df = df[~excluded_series[codes]]
+
+    if total is not None and (df['Course Code'] == total).any():
+        is_total = (df['Course Code'] == total).to_numpy()
+        course_sum = df.loc[~is_total].groupby('Original_Year')['Enrollment'].sum()
+        total_values = df.loc[is_total].groupby('Original_Year')['Enrollment'].sum()
+        course_sum = course_sum.reindex(total_values.index)
+        relative = (total_values - course_sum).abs() / total_values.abs()
+        mismatch = relative[relative > total_tolerance]
+        if len(mismatch):
+            report.append(pd.DataFrame({'course': total, 'year': mismatch.index.to_numpy(),
+                                        'issue': 'total_mismatch', 'action': 'flagged',
+                                        'value': (total_values - course_sum)[mismatch.index].to_numpy()}))
+
+    report = [part for part in report if len(part)]
+    if not report:
+        return df, pd.DataFrame(columns=REPORT_COLUMNS)
+    return df, pd.concat(report, ignore_index=True)
+
+
+def print_validation_summary(report):
+    """One line per issue type, with the courses excluded from fitting"""
+    if report.empty:
+        return
+    counts = report.groupby(['issue', 'action'], sort=False).size()
+    print("Data validation: " + ', '.join(f"{count} {issue} ({action})" for (issue, action), count in counts.items()))
+    excluded = report.loc[report['action'] == 'excluded', 'course'].unique()
+    if len(excluded):
+        print(f"Excluded from forecasting: {', '.join(excluded)}")
@@ -0,0 +1,284 @@
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .model import FORECAST_END_YEAR, PROPHET_PARAMS, growth_params
+from .results import ForecastResults
+
+# Column order of a Prophet forecast frame, so both engines are interchangeable
+FORECAST_COLUMNS = [
+    'ds', 'trend', 'cap', 'floor', 'yhat_lower', 'yhat_upper',
+    'trend_lower', 'trend_upper',
+    'additive_terms', 'additive_terms_lower', 'additive_terms_upper',
+    'multiplicative_terms', 'multiplicative_terms_lower', 'multiplicative_terms_upper',
+    'yhat', 'year'
+]
+
+
+def pack_series(df):
+    """Left-align every course's history into NaN-padded (courses x years) arrays.
+
+    GRAND_TOTAL comes first, then courses in input order. Courses with fewer
+    than 3 rows are dropped, matching forecast_all_courses.
+    """
+    df = df.sort_values('Original_Year', kind='stable')
+    courses = list(pd.unique(df['Course Code']))
+    if 'GRAND_TOTAL' in courses:
+        courses.remove('GRAND_TOTAL')
+        courses.insert(0, 'GRAND_TOTAL')
+
+    sizes = df['Course Code'].value_counts()
+    courses = [c for c in courses if c == 'GRAND_TOTAL' or sizes[c] >= 3]
+    if not courses:
+        return np.array([], dtype=object), np.zeros((0, 0)), np.zeros((0, 0), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    df = df[df['Course Code'].isin(courses)]
+
+    rows = pd.Categorical(df['Course Code'], categories=courses).codes
+    cols = df.groupby('Course Code', sort=False, observed=True).cumcount().to_numpy()
+    lengths = np.bincount(rows, minlength=len(courses))
+
+    values = np.full((len(courses), lengths.max()), np.nan)
+    years = np.zeros((len(courses), lengths.max()), dtype=np.int64)
+    values[rows, cols] = df['Enrollment'].to_numpy(dtype=np.float64)
+    years[rows, cols] = df['Original_Year'].to_numpy()
+
+    return np.array(courses, dtype=object), values, years, lengths
+
+
+def growth_and_bounds(courses, values, lengths, params=None):
+    """Vectorized calculate_growth_and_bounds over every course row at once"""
+    params = growth_params(params)
+    rows = np.arange(len(courses))
+    last = lengths - 1
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        changes = values[:, 1:] / values[:, :-1] - 1
+        # A change from zero (segment series can have empty years) has no growth rate
+        changes[~np.isfinite(changes)] = np.nan
+        overall_growth = np.nanmean(changes, axis=1)
+
+        # The last 3 values give the 2 most recent changes
+        recent = np.full((len(courses), 2), np.nan)
+        for k in (1, 2):
+            valid = last - k >= 0
+            recent[valid, k - 1] = changes[rows[valid], last[valid] - k]
+        recent_growth = np.nanmean(recent, axis=1)
+
+    weighted_growth = (recent_growth * params['recent_weight']
+                       + overall_growth * params['overall_weight']) * params['dampening']
+
+    historical_max = np.nanmax(values, axis=1)
+    historical_min = np.nanmin(values, axis=1)
+    current_value = values[rows, last]
+
+    is_total = courses == 'GRAND_TOTAL'
+    growing = weighted_growth > 0
+
+    def bound(kind, combine, historical):
+        scale_historical, scale_current = params[kind]
+        return combine(historical * scale_historical, current_value * scale_current)
+
+    cap = np.where(
+        is_total,
+        bound('total_cap', np.minimum, historical_max),
+        np.where(growing,
+                 bound('growing_cap', np.minimum, historical_max),
+                 bound('declining_cap', np.minimum, historical_max))
+    )
+    floor = np.where(
+        is_total,
+        bound('total_floor', np.maximum, historical_min),
+        np.where(growing,
+                 bound('growing_floor', np.maximum, historical_min),
+                 bound('declining_floor', np.maximum, historical_min))
+    )
+    return weighted_growth, cap, floor
+
+
+def _forecast_grid(years, lengths, end_year=FORECAST_END_YEAR):
+    """Dates of Prophet's history + make_future_dataframe(freq='Y') rows per course.
+
+    History rows sit on Jan 1; future rows are year ends from the last
+    history year up to end_year - 1.
+    """
+    n_courses = len(lengths)
+    last_year = years[np.arange(n_courses), lengths - 1]
+    periods = end_year - last_year
+    total = lengths + periods
+    width = total.max()
+
+    pos = np.broadcast_to(np.arange(width), (n_courses, width))
+    valid = pos < total[:, None]
+    is_history = pos < lengths[:, None]
+    # 0 for the history rows, 1.. for each future row
+    steps = np.where(is_history, 0, pos - lengths[:, None] + 1)
+
+    year = np.where(
+        is_history,
+        np.pad(years, ((0, 0), (0, width - years.shape[1]))),
+        last_year[:, None] + steps - 1
+    )
+    month_day = np.where(is_history, '-01-01', '-12-31')
+    ds = np.where(valid, np.char.add(year.astype(str), month_day), '1970-01-01').astype('datetime64[ns]')
+
+    return ds, year, valid, is_history, last_year
+
+
+def _ewm(values, valid, span=3):
+    """Row-wise pandas ewm(span, adjust=False).mean() for left-aligned rows"""
+    alpha = 2 / (span + 1)
+    smoothed = values.copy()
+    for col in range(1, values.shape[1]):
+        step = valid[:, col]
+        smoothed[step, col] = (1 - alpha) * smoothed[step, col - 1] + alpha * values[step, col]
+    return smoothed
+
+
+def _interval_offsets(residuals, lengths, horizons, interval, n_samples, seed):
+    """Lower/upper offsets per course and horizon, analytic or residual bootstrap"""
+    width = PROPHET_PARAMS['interval_width']
+    n_courses = len(lengths)
+
+    if interval == 'analytic':
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            sigma = np.nanstd(residuals, axis=1, ddof=1)
+        sigma = np.nan_to_num(sigma)
+        z = NormalDist().inv_cdf(0.5 + width / 2)
+        half = z * sigma[:, None] * np.sqrt(1 + np.arange(horizons))
+        return -half, half
+
+    if interval == 'bootstrap':
+        # Sum h + 1 resampled residuals for a row h years past the history
+        rng = np.random.default_rng(seed)
+        draws = rng.integers(0, np.iinfo(np.int64).max, size=(n_courses, n_samples, horizons))
+        draws %= lengths[:, None, None]
+        paths = np.nan_to_num(residuals[np.arange(n_courses)[:, None, None], draws]).cumsum(axis=2)
+        lower = np.quantile(paths, (1 - width) / 2, axis=1)
+        upper = np.quantile(paths, (1 + width) / 2, axis=1)
+        return lower, upper
+
+    raise ValueError(f"Unknown interval method: {interval}")
+
+
+def forecast_all_courses_vectorized(df, interval='analytic', n_samples=1000, seed=0, compact=False,
+                                    params=None, end_year=FORECAST_END_YEAR):
+    """Forecast every course with NumPy instead of one Prophet fit per course.
+
+    Mirrors create_prophet_forecast step by step: weighted growth, cap/floor,
+    a least-squares trend standing in for the Prophet fit, log1p growth for
+    future years, clipping and EWM smoothing. Intervals are either analytic
+    (residual sigma widening with sqrt of the horizon) or a residual
+    bootstrap. Returns {course: forecast} with the Prophet column layout,
+    or with compact=True a results.ForecastResults cut straight from the
+    (courses x years) arrays without building any per-course frame.
+    params overrides GROWTH_PARAMS and end_year moves the horizon.
+    """
+    courses, values, years, lengths = pack_series(df)
+    if len(courses) == 0:
+        return ForecastResults.from_blocks([], []) if compact else {}
+    weighted_growth, cap, floor = growth_and_bounds(courses, values, lengths, params)
+    ds, year, valid, is_history, last_year = _forecast_grid(years, lengths, end_year)
+
+    # Least-squares trend on the history, evaluated on the whole grid
+    t = (ds - np.datetime64('1970-01-01', 'ns')) / np.timedelta64(1, 'D') / 365.25
+    history_t = np.where(is_history, t, np.nan)[:, :values.shape[1]]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        t_mean = np.nanmean(history_t, axis=1, keepdims=True)
+        y_mean = np.nanmean(values, axis=1, keepdims=True)
+        slope = np.nansum((history_t - t_mean) * (values - y_mean), axis=1, keepdims=True) \
+            / np.nansum((history_t - t_mean) ** 2, axis=1, keepdims=True)
+    slope = np.nan_to_num(slope)
+    trend = y_mean + slope * (t - t_mean)
+
+    yhat = np.clip(trend, floor[:, None], cap[:, None])
+
+    # Logarithmic growth from the last fitted value for years past the history
+    future = valid & (year > last_year[:, None])
+    years_out = np.where(future, year - last_year[:, None], 0)
+    base_value = yhat[np.arange(len(courses)), np.minimum(lengths, yhat.shape[1] - 1)]
+    growth_factor = np.log1p(years_out * np.abs(weighted_growth)[:, None]) * np.sign(weighted_growth)[:, None]
+    yhat = np.where(future, base_value[:, None] * (1 + growth_factor), yhat)
+    yhat = np.clip(yhat, floor[:, None], cap[:, None])
+
+    residuals = values - yhat[:, :values.shape[1]]
+
+    yhat = _ewm(yhat, valid)
+
+    lower_offset, upper_offset = _interval_offsets(
+        residuals, lengths, years_out.max() + 1, interval, n_samples, seed
+    )
+    rows = np.arange(len(courses))[:, None]
+    yhat_lower = np.maximum(yhat + lower_offset[rows, years_out], floor[:, None])
+    yhat_upper = np.minimum(yhat + upper_offset[rows, years_out], cap[:, None])
+
+    if compact:
+        # Row-major boolean indexing keeps each course's rows together and in order
+        block = np.vstack([array[valid] for array in (year, yhat, yhat_lower, yhat_upper)]).astype(np.float32)
+        offsets = np.zeros(len(courses) + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=offsets[1:])
+        return ForecastResults(courses, block, offsets)
+
+    forecasts = {}
+    for i, course in enumerate(courses):
+        n = valid[i].sum()
+        zeros = np.zeros(n)
+        forecasts[course] = pd.DataFrame({
+            'ds': ds[i, :n],
+            'trend': trend[i, :n],
+            'cap': cap[i],
+            'floor': floor[i],
+            'yhat_lower': yhat_lower[i, :n],
+            'yhat_upper': yhat_upper[i, :n],
+            'trend_lower': trend[i, :n],
+            'trend_upper': trend[i, :n],
+            'additive_terms': zeros,
+            'additive_terms_lower': zeros,
+            'additive_terms_upper': zeros,
+            'multiplicative_terms': zeros,
+            'multiplicative_terms_lower': zeros,
+            'multiplicative_terms_upper': zeros,
+            'yhat': yhat[i, :n],
+            'year': year[i, :n].astype(np.int32),
+        }, columns=FORECAST_COLUMNS)
+
+    return forecasts
+
+
+def parity_report(df, vectorized=None, prophet=None):
+    """Compare vectorized and Prophet forecasts course by course.
+
+    Either set of forecasts is computed when not given. Returns one row per
+    course with yhat and interval errors of the vectorized engine measured
+    against Prophet, over all rows and over future years only.
+    """
+    if vectorized is None:
+        vectorized = forecast_all_courses_vectorized(df)
+    if prophet is None:
+        from .model import forecast_all_courses
+        prophet = forecast_all_courses(df, diagnostics=True)
+
+    last_year = df['Original_Year'].max()
+    report = []
+    for course in prophet:
+        if course not in vectorized:
+            continue
+        merged = prophet[course].merge(vectorized[course], on='ds', suffixes=('_prophet', '_vectorized'))
+        future = merged['year_prophet'] > last_year
+        diff = merged['yhat_vectorized'] - merged['yhat_prophet']
+        report.append({
+            'course': course,
+            'rows': len(merged),
+            'yhat_mae': diff.abs().mean(),
+            'yhat_max_abs_diff': diff.abs().max(),
+            'yhat_mape': (diff.abs() / merged['yhat_prophet'].abs()).mean() * 100,
+            'future_mape': (diff[future].abs() / merged.loc[future, 'yhat_prophet'].abs()).mean() * 100,
+            'lower_mae': (merged['yhat_lower_vectorized'] - merged['yhat_lower_prophet']).abs().mean(),
+            'upper_mae': (merged['yhat_upper_vectorized'] - merged['yhat_upper_prophet']).abs().mean(),
+        })
+
+    return pd.DataFrame(report).set_index('course')